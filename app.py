@@ -1,24 +1,54 @@
+import io
 import os
 from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 
-from flask import Flask, request, jsonify
+import click
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from flask_migrate import Migrate
-from sqlalchemy import func
+from sqlalchemy import delete, false, func, insert, literal, select
 
 from models import (
     db,
+    User,
     Game,
     ChecklistItem,
     CommunityChecklist,
     CommunityChecklistItem,
+    Job,
+    GAME_FIELDS,
 )
 from users import register_user, login_user
+from http_cache import not_modified, with_etag
+from cache import template_cache
+from json_provider import init_json
+from projection import FieldsError, Projection
+import hashing
+from metrics import init_metrics
+from querybudget import init_query_budgets, query_budget
+from engine_profiles import engine_options, init_pool_stats, pool_report, resolve_profile
+from replica import REPLICA_BIND, STICKY_HEADER, init_replica, replica_url, use_replica
+from thumbnails import (
+    BACKFILL_CHUNK_SIZE,
+    BACKFILL_MAX_CHUNKS_PER_REQUEST,
+    backfill_thumbnails,
+)
+from jobs import enqueue, job_handler, set_progress, work
+from library import iter_library_ndjson, import_library, parse_csv, parse_ndjson
+from search import (
+    community_listing_fields,
+    community_listing_query,
+    search_community_checklists,
+)
 from checklist import (
+    ORDER_GAP,
+    recount_progress,
+    rebalance_orders,
     add_checklist_item,
     get_checklist,
     update_checklist_item,
     delete_checklist_item,
+    batch_checklist,
+    reorder_checklist,
 )
 
 # --------- Helpers ---------
@@ -29,6 +59,10 @@ def normalize_db_url(url: str) -> str:
     if url.startswith("postgres://"):
         url = url.replace("postgres://", "postgresql://", 1)
 
+    # Only Postgres takes sslmode; leave local SQLite URLs untouched
+    if not url.startswith("postgresql"):
+        return url
+
     parsed = urlparse(url)
     q = dict(parse_qsl(parsed.query))
 
@@ -43,12 +77,33 @@ def clean_str(value):
     return value or None
 
 
+def is_int(value):
+    # JSON true/false decode to bool, which is an int subclass
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def arg_flag(name):
+    return (request.args.get(name) or "").strip().lower() in ("1", "true", "yes")
+
+
+def job_accepted(job):
+    status_url = f"/api/jobs/{job.job_id}"
+    resp = jsonify({"message": "Job queued", "job_id": job.job_id, "status_url": status_url})
+    resp.headers["Location"] = status_url
+    return resp, 202
+
+
 # --------- App ---------
 app = Flask(__name__)
+init_json(app)
 
 # --------- CORS ---------
 allowed_origins = os.environ.get("CORS_ORIGINS", "*").split(",")
-CORS(app, resources={r"/api/*": {"origins": allowed_origins}})
+CORS(
+    app,
+    resources={r"/api/*": {"origins": allowed_origins}},
+    expose_headers=["ETag", "X-Next-Cursor", STICKY_HEADER],
+)
 
 # --------- Database ---------
 raw_db_url = os.getenv(
@@ -59,13 +114,29 @@ db_url = normalize_db_url(raw_db_url)
 
 app.config["SQLALCHEMY_DATABASE_URI"] = db_url
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_pre_ping": True,
-    "pool_recycle": 300,
-}
+engine_profile = resolve_profile()
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(db_url, engine_profile)
+
+# Optional streaming replica for read-only routes (see replica.use_replica)
+if replica_url():
+    replica_db_url = normalize_db_url(replica_url())
+    app.config["SQLALCHEMY_BINDS"] = {
+        REPLICA_BIND: {"url": replica_db_url, **engine_options(replica_db_url, engine_profile)},
+    }
 
 db.init_app(app)
-migrate = Migrate(app, db)
+# Flask-Migrate pulls in Alembic, a large share of import time and memory in
+# every web worker. Only the `flask db` commands use it, and the flask CLI
+# always imports the app inside a click context.
+if click.get_current_context(silent=True) is not None:
+    from flask_migrate import Migrate
+
+    migrate = Migrate(app, db)
+init_metrics(app, db)
+init_query_budgets(app)
+init_replica(app)
+with app.app_context():
+    init_pool_stats(db.engines)
 
 # --------- Defaults ---------
 DEFAULT_THUMB = os.environ.get(
@@ -73,40 +144,108 @@ DEFAULT_THUMB = os.environ.get(
     "https://completionist-tracker.netlify.app/images/fallback_thumbnail.png",
 )
 
+# --------- Pagination ---------
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", 500))
+STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", 500))
+
+
+def _stream_json_array(q, serialize):
+    # yield_per turns on stream_results, so Postgres hands rows over from a
+    # server-side cursor instead of buffering the whole result
+    yield "["
+    first = True
+    for row in q.yield_per(STREAM_BATCH_SIZE):
+        yield ("" if first else ",") + app.json.dumps(serialize(row))
+        first = False
+    yield "]"
+
+
+def keyset_response(q, key_col, serialize):
+    """Serve ``q`` newest-first by ``key_col``.
+
+    ``?limit=N`` returns one page and, when more rows exist, the cursor for the
+    next one in ``X-Next-Cursor``; pass it back as ``?cursor=``. ``?stream=1``
+    sends rows as they are read. With neither, the full list is returned.
+    """
+    cursor = request.args.get("cursor", type=int)
+    limit = request.args.get("limit", type=int)
+
+    if cursor is not None:
+        q = q.filter(key_col < cursor)
+    q = q.order_by(key_col.desc())
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if arg_flag("stream"):
+        if limit is not None:
+            q = q.limit(limit)
+        body = stream_with_context(_stream_json_array(q, serialize))
+        return Response(body, mimetype="application/json"), 200
+
+    if limit is None:
+        return jsonify([serialize(r) for r in q.all()]), 200
+
+    rows = q.limit(limit + 1).all()
+    resp = jsonify([serialize(r) for r in rows[:limit]])
+    if len(rows) > limit:
+        resp.headers["X-Next-Cursor"] = str(getattr(rows[limit - 1], key_col.key))
+    return resp, 200
+
+
 # --------- Auth ---------
 @app.route("/api/register", methods=["POST"])
+@query_budget(3)
 def register():
     return register_user()
 
 
 @app.route("/api/login", methods=["POST"])
+@query_budget(2)  # lookup, plus one UPDATE when the hash is upgraded
 def login():
     return login_user()
 
 
 # --------- Checklist ---------
 @app.route("/api/games/<int:game_id>/checklist", methods=["GET"])
+@query_budget(2)
+@use_replica
 def fetch_checklist(game_id):
     return get_checklist(game_id)
 
 
 @app.route("/api/games/<int:game_id>/checklist", methods=["POST"])
+@query_budget(3)
 def create_checklist_item(game_id):
     return add_checklist_item(game_id)
 
 
+@app.route("/api/games/<int:game_id>/checklist", methods=["PATCH"])
+@query_budget(7)
+def batch_update_checklist(game_id):
+    return batch_checklist(game_id)
+
+
+@app.route("/api/games/<int:game_id>/checklist/reorder", methods=["POST"])
+@query_budget(7)
+def reorder_items(game_id):
+    return reorder_checklist(game_id)
+
+
 @app.route("/api/checklist/<int:item_id>", methods=["PUT"])
+@query_budget(4)
 def update_item(item_id):
     return update_checklist_item(item_id)
 
 
 @app.route("/api/checklist/<int:item_id>", methods=["DELETE"])
+@query_budget(3)
 def delete_item(item_id):
     return delete_checklist_item(item_id)
 
 
 # --------- Games ---------
 @app.route("/api/games", methods=["POST"])
+@query_budget(2)
 def add_game():
     data = request.get_json(silent=True) or {}
 
@@ -134,26 +273,41 @@ def add_game():
 
 
 @app.route("/api/games/<int:game_id>", methods=["GET"])
+@query_budget(1)
+@use_replica
 def get_game(game_id):
-    game = db.session.get(Game, game_id)
+    fields = GAME_FIELDS.requested()
+    game = (
+        db.session.query(Game.version, *GAME_FIELDS.columns(fields))
+        .filter(Game.game_id == game_id)
+        .first()
+    )
     if not game:
         return jsonify({"message": "Game not found"}), 404
-    return jsonify(game.to_dict()), 200
+
+    etag = f"game-{game_id}-{game.version}{Projection.etag_suffix(fields)}"
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    return with_etag(jsonify(GAME_FIELDS.serializer(fields)(game)), etag), 200
 
 
 @app.route("/api/games", methods=["GET"])
+@query_budget(1)
+@use_replica
 def list_games():
     user_id = request.args.get("user_id", type=int)
+    fields = GAME_FIELDS.requested()
 
-    q = db.session.query(Game)
+    q = db.session.query(*GAME_FIELDS.columns(fields))
     if user_id is not None:
-        q = q.filter_by(user_id=user_id)
+        q = q.filter(Game.user_id == user_id)
 
-    rows = q.order_by(Game.game_id.desc()).all()
-    return jsonify([g.to_dict() for g in rows]), 200
+    return keyset_response(q, Game.game_id, GAME_FIELDS.serializer(fields))
 
 
 @app.route("/api/games/<int:game_id>", methods=["PATCH", "PUT"])
+@query_budget(3)
 def update_game(game_id):
     game = db.session.get(Game, game_id)
     if not game:
@@ -202,69 +356,200 @@ def update_game(game_id):
 
 
 @app.route("/api/games/<int:game_id>", methods=["DELETE"])
+@query_budget(1)
 def delete_game(game_id):
-    game = db.session.get(Game, game_id)
-    if not game:
+    # Checklist items go with the game through ON DELETE CASCADE
+    deleted = db.session.execute(
+        delete(Game).where(Game.game_id == game_id),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    if not deleted:
         return jsonify({"message": "Game not found"}), 404
 
-    db.session.query(ChecklistItem).filter_by(game_id=game_id).delete(
-        synchronize_session=False
-    )
-    db.session.delete(game)
     db.session.commit()
-
     return jsonify({"message": "Game deleted"}), 200
 
 
+BULK_DELETE_MAX_IDS = 1000
+BULK_DELETE_CHUNK_SIZE = 500  # games per transaction in the background job
+
+
+def delete_user_games(user_id, game_ids=None):
+    """Delete ``game_ids`` of ``user_id`` (all of the user's games when None) in one statement."""
+    stmt = delete(Game).where(Game.user_id == user_id)
+    if game_ids is not None:
+        stmt = stmt.where(Game.game_id.in_(game_ids))
+    return db.session.execute(stmt, execution_options={"synchronize_session": False}).rowcount
+
+
+@app.route("/api/games/bulk-delete", methods=["POST"])
+@query_budget(2)
+def bulk_delete_games():
+    """Body: {"user_id": 1, "game_ids": [..]} or {"user_id": 1, "all": true}. ?async=1 queues a job."""
+    data = request.get_json(silent=True) or {}
+    user_id = data.get("user_id")
+    game_ids = data.get("game_ids")
+    delete_all = data.get("all") is True
+
+    if not is_int(user_id):
+        return jsonify({"message": "user_id is required"}), 400
+    if delete_all == (game_ids is not None):
+        return jsonify({"message": "pass either game_ids or all: true"}), 400
+    if game_ids is not None:
+        if not isinstance(game_ids, list) or not game_ids or not all(is_int(i) for i in game_ids):
+            return jsonify({"message": "game_ids must be a non-empty list of integers"}), 400
+        if len(game_ids) > BULK_DELETE_MAX_IDS:
+            return jsonify({"message": f"at most {BULK_DELETE_MAX_IDS} game_ids per request"}), 400
+        game_ids = sorted(set(game_ids))
+
+    if arg_flag("async"):
+        return job_accepted(enqueue("delete_games", {"user_id": user_id, "game_ids": game_ids}))
+
+    deleted = delete_user_games(user_id, game_ids)
+    db.session.commit()
+    return jsonify({"message": "Games deleted", "deleted": deleted}), 200
+
+
+@job_handler("delete_games")
+def delete_games_job(job):
+    # Chunked so clearing a large account never holds one long transaction;
+    # a retry just deletes whatever is left
+    user_id, game_ids = job.payload["user_id"], job.payload.get("game_ids")
+    deleted = (job.progress or {}).get("deleted", 0)
+    while True:
+        q = select(Game.game_id).where(Game.user_id == user_id)
+        if game_ids is not None:
+            q = q.where(Game.game_id.in_(game_ids))
+        chunk = db.session.scalars(q.order_by(Game.game_id).limit(BULK_DELETE_CHUNK_SIZE)).all()
+        if not chunk:
+            return {"deleted": deleted}
+        deleted += delete_user_games(user_id, chunk)
+        set_progress(job, {"deleted": deleted, "last_game_id": chunk[-1]})
+
+
 @app.route("/api/games/<int:game_id>/progress", methods=["GET"])
+@query_budget(1)
+@use_replica
 def game_progress(game_id):
-    if not db.session.get(Game, game_id):
+    game = db.session.get(Game, game_id)
+    if not game:
         return jsonify({"message": "Game not found"}), 404
 
-    total = (
-        db.session.query(func.count(ChecklistItem.checklist_item_id))
-        .filter_by(game_id=game_id)
-        .scalar()
-    )
-    done = (
-        db.session.query(func.count(ChecklistItem.checklist_item_id))
-        .filter_by(game_id=game_id, completed=True)
-        .scalar()
-    )
+    return jsonify({
+        "game_id": game_id,
+        "completed": game.completed_items,
+        "total": game.total_items,
+        "percent": game.progress,
+    }), 200
+
+
+@app.cli.command("recount-progress")
+@click.option("--game-id", type=int, default=None, help="Only recount this game.")
+def recount_progress_command(game_id):
+    """Rebuild game progress counters from checklist_item."""
+    updated = recount_progress(game_id)
+    click.echo(f"Recounted {updated} game(s)")
+
+
+@app.cli.command("rebalance-orders")
+@click.argument("game_id", type=int)
+def rebalance_orders_command(game_id):
+    """Respace a game's checklist orders evenly."""
+    count = rebalance_orders(game_id)
+    db.session.commit()
+    click.echo(f"Respaced {count} item(s)")
 
-    total = int(total or 0)
-    done = int(done or 0)
-    pct = 0 if total == 0 else round((done / total) * 100)
 
-    return jsonify({"game_id": game_id, "completed": done, "total": total, "percent": pct}), 200
+@job_handler("rebalance_orders")
+def rebalance_orders_job(job):
+    # Queued by reorder_checklist when a move leaves (almost) no gap
+    count = rebalance_orders(job.payload["game_id"])
+    db.session.commit()
+    return {"respaced": count}
+
+
+# --------- Library ---------
+@app.route("/api/users/<int:user_id>/export", methods=["GET"])
+@query_budget(1)
+@use_replica
+def export_library(user_id):
+    body = stream_with_context(iter_library_ndjson(user_id))
+    return Response(
+        body,
+        mimetype="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="library-{user_id}.ndjson"'},
+    ), 200
+
+
+@app.cli.command("export-library")
+@click.argument("user_id", type=int)
+@click.option("--output", "-o", type=click.File("w"), default="-", help="Defaults to stdout.")
+def export_library_command(user_id, output):
+    """Write a user's games and checklists as NDJSON."""
+    for line in iter_library_ndjson(user_id):
+        output.write(line)
+
+
+def _import_parser(fmt, content_type=""):
+    if fmt == "csv" or (not fmt and "csv" in (content_type or "")):
+        return parse_csv
+    return parse_ndjson
+
+
+@app.route("/api/users/<int:user_id>/import", methods=["POST"])
+# User lookup, then a game INSERT ... RETURNING and an item insert (COPY on
+# Postgres) per batch of IMPORT_BATCH_GAMES games
+@query_budget(3, sqlite_per_row=1)
+def import_library_route(user_id):
+    if not db.session.get(User, user_id):
+        return jsonify({"message": "User not found"}), 404
+
+    parse = _import_parser(request.args.get("format"), request.content_type)
+    # Read the body incrementally rather than buffering the whole upload
+    lines = io.TextIOWrapper(request.stream, encoding="utf-8", newline="")
+    return jsonify(import_library(user_id, parse(lines))), 200
+
+
+@app.cli.command("import-library")
+@click.argument("user_id", type=int)
+@click.argument("source", type=click.File("r", encoding="utf-8"))
+@click.option("--format", "fmt", type=click.Choice(["ndjson", "csv"]), default=None,
+              help="Defaults to the file extension.")
+def import_library_command(user_id, source, fmt):
+    """Bulk-import games and checklist items from NDJSON or CSV."""
+    if fmt is None and source.name.endswith(".csv"):
+        fmt = "csv"
+    result = import_library(user_id, _import_parser(fmt)(source))
+    click.echo(app.json.dumps(result))
 
 
 # --------- Community ---------
 @app.route("/api/community", methods=["GET"])
+@query_budget(1)
+@use_replica
 def list_community_checklists():
-    templates = CommunityChecklist.query.order_by(
-        CommunityChecklist.community_checklist_id.desc()
-    ).all()
-
-    out = []
-    for t in templates:
-        out.append({
-            "community_checklist_id": t.community_checklist_id,
-            "title": t.title,
-            "description": t.description,
-            "platform": t.platform,
-            "genre": t.genre,
-            "run_type": t.run_type,
-            "tags": t.tags,
-            "thumbnail_url": t.thumbnail_url or DEFAULT_THUMB,
-            "items_count": len(t.items),
-            "created_by_username": t.created_by_user.username if t.created_by_user else None,
-        })
+    listing = community_listing_fields(DEFAULT_THUMB)
+    fields = listing.requested()
+
+    # items_count is maintained on the template, so one joined query covers the page
+    rows = (
+        community_listing_query(listing.columns(fields))
+        .order_by(CommunityChecklist.community_checklist_id.desc())
+        .all()
+    )
+    serialize = listing.serializer(fields)
+    return jsonify([serialize(t) for t in rows]), 200
+
 
-    return jsonify(out), 200
+@app.route("/api/community/search", methods=["GET"])
+@query_budget(5)
+@use_replica
+def search_community():
+    return search_community_checklists(DEFAULT_THUMB)
 
 
 @app.route("/api/community/import/<int:template_id>", methods=["POST"])
+@query_budget(5)
 def import_community_checklist(template_id):
     data = request.get_json(silent=True) or {}
     user_id = data.get("user_id")
@@ -276,6 +561,17 @@ def import_community_checklist(template_id):
     if not template:
         return jsonify({"message": "Template not found"}), 404
 
+    if arg_flag("async"):
+        return job_accepted(
+            enqueue("community_import", {"template_id": template_id, "user_id": user_id})
+        )
+
+    new_game = copy_community_template(template, user_id)
+    db.session.commit()
+    return jsonify({"message": "Checklist imported", "new_game_id": new_game.game_id}), 201
+
+
+def copy_community_template(template, user_id):
     new_game = Game(
         user_id=user_id,
         title=template.title,
@@ -289,21 +585,40 @@ def import_community_checklist(template_id):
     db.session.add(new_game)
     db.session.flush()
 
-    for itm in template.items:
-        db.session.add(
-            ChecklistItem(
-                game_id=new_game.game_id,
-                description=itm.description,
-                completed=False,
-                order=itm.order,
-            )
+    # Copy the template's items server-side in one INSERT ... SELECT, spaced
+    # ORDER_GAP apart whatever the template's own orders are
+    position = func.row_number().over(
+        order_by=(CommunityChecklistItem.order.asc().nulls_last(), CommunityChecklistItem.community_item_id)
+    )
+    copied = db.session.execute(
+        insert(ChecklistItem).from_select(
+            ["game_id", "description", "completed", "order"],
+            select(
+                literal(new_game.game_id),
+                CommunityChecklistItem.description,
+                false(),
+                position * ORDER_GAP,
+            ).where(
+                CommunityChecklistItem.community_checklist_id == template.community_checklist_id
+            ),
         )
+    )
+    new_game.total_items = copied.rowcount
+    return new_game
 
+
+@job_handler("community_import")
+def community_import_job(job):
+    template = db.session.get(CommunityChecklist, job.payload["template_id"])
+    if template is None:
+        raise LookupError("Template not found")
+    new_game = copy_community_template(template, job.payload["user_id"])
     db.session.commit()
-    return jsonify({"message": "Checklist imported", "new_game_id": new_game.game_id}), 201
+    return {"new_game_id": new_game.game_id}
 
 
 @app.route("/api/community", methods=["POST"])
+@query_budget(3)
 def create_community_checklist():
     data = request.get_json(silent=True) or {}
 
@@ -313,21 +628,8 @@ def create_community_checklist():
     if not title or not created_by_user_id:
         return jsonify({"message": "created_by_user_id and non-empty title are required"}), 400
 
-    cc = CommunityChecklist(
-        title=title,
-        description=clean_str(data.get("description")),
-        platform=clean_str(data.get("platform")),
-        genre=clean_str(data.get("genre")),
-        run_type=clean_str(data.get("run_type")),
-        tags=clean_str(data.get("tags")),
-        thumbnail_url=clean_str(data.get("thumbnail_url")),
-        created_by_user_id=created_by_user_id,
-    )
-    db.session.add(cc)
-    db.session.flush()
-
     items = data.get("items") or []
-    order_counter = 1
+    item_rows = []
 
     for itm in items:
         if isinstance(itm, dict):
@@ -340,29 +642,124 @@ def create_community_checklist():
         if not desc:
             continue
 
-        db.session.add(
-            CommunityChecklistItem(
-                community_checklist_id=cc.community_checklist_id,
-                description=desc,
-                order=ordv if isinstance(ordv, int) else order_counter,
-            )
+        item_rows.append({
+            "description": desc,
+            "order": ordv if isinstance(ordv, int) and not isinstance(ordv, bool) else None,
+        })
+
+    # Same spacing as checklists; items without an order go after the explicit ones
+    order = max((row["order"] for row in item_rows if row["order"] is not None), default=0)
+    for row in item_rows:
+        if row["order"] is None:
+            order += ORDER_GAP
+            row["order"] = order
+
+    cc = CommunityChecklist(
+        title=title,
+        description=clean_str(data.get("description")),
+        platform=clean_str(data.get("platform")),
+        genre=clean_str(data.get("genre")),
+        run_type=clean_str(data.get("run_type")),
+        tags=clean_str(data.get("tags")),
+        thumbnail_url=clean_str(data.get("thumbnail_url")),
+        created_by_user_id=created_by_user_id,
+        items_count=len(item_rows),
+    )
+    db.session.add(cc)
+    db.session.flush()
+
+    # Items need no ids back, so they go in as one executemany
+    if item_rows:
+        db.session.execute(
+            insert(CommunityChecklistItem),
+            [{**row, "community_checklist_id": cc.community_checklist_id} for row in item_rows],
         )
-        order_counter += 1
 
     db.session.commit()
     return jsonify({"message": "Community checklist created", "community_checklist_id": cc.community_checklist_id}), 201
 
 
+# Served from the primary: template_cache must not be filled from a lagging replica
 @app.route("/api/community/<int:template_id>", methods=["GET"])
+@query_budget(4)
 def get_community_checklist(template_id):
-    t = db.session.get(CommunityChecklist, template_id)
-    if not t:
+    fields = COMMUNITY_DETAIL_FIELDS.requested()
+    if fields is not None:
+        return _community_checklist_subset(template_id, fields)
+
+    cached = template_cache.get(template_id)
+    if cached is None:
+        version = db.session.scalar(
+            select(CommunityChecklist.version).where(
+                CommunityChecklist.community_checklist_id == template_id
+            )
+        )
+        if version is None:
+            return jsonify({"message": "Template not found"}), 404
+
+        t = db.session.get(CommunityChecklist, template_id)
+        cached = (
+            f"community-{template_id}-{version}",
+            app.json.dumps(t.to_dict(include_items=True)),
+        )
+        template_cache.set(template_id, cached)
+
+    etag, body = cached
+    hit = not_modified(etag)
+    if hit is not None:
+        return hit
+    return with_etag(Response(body, mimetype="application/json"), etag), 200
+
+
+COMMUNITY_DETAIL_FIELDS = Projection(
+    {
+        "community_checklist_id": CommunityChecklist.community_checklist_id,
+        "title": CommunityChecklist.title,
+        "description": CommunityChecklist.description,
+        "platform": CommunityChecklist.platform,
+        "genre": CommunityChecklist.genre,
+        "run_type": CommunityChecklist.run_type,
+        "tags": CommunityChecklist.tags,
+        "thumbnail_url": CommunityChecklist.thumbnail_url,
+        "items_count": CommunityChecklist.items_count,
+        "created_by_user_id": CommunityChecklist.created_by_user_id,
+        "created_by_username": ((User.username,), lambda t: t.username),
+    },
+    full=None,
+    always=(CommunityChecklist.version,),
+    extra=("items",),
+)
+
+
+def _community_checklist_subset(template_id, fields):
+    # Partial bodies skip template_cache, which only holds the full document
+    columns = COMMUNITY_DETAIL_FIELDS.columns(fields)
+    q = db.session.query(*columns).filter(CommunityChecklist.community_checklist_id == template_id)
+    if any(c is User.username for c in columns):
+        q = q.outerjoin(User, User.user_id == CommunityChecklist.created_by_user_id)
+    t = q.first()
+    if t is None:
         return jsonify({"message": "Template not found"}), 404
-    return jsonify(t.to_dict(include_items=True)), 200
+
+    etag = f"community-{template_id}-{t.version}{Projection.etag_suffix(fields)}"
+    hit = not_modified(etag)
+    if hit is not None:
+        return hit
+
+    data = COMMUNITY_DETAIL_FIELDS.serializer(fields)(t)
+    if "items" in fields:
+        items = (
+            CommunityChecklistItem.query.filter_by(community_checklist_id=template_id)
+            .order_by(CommunityChecklistItem.order)
+            .all()
+        )
+        data["items"] = [i.to_dict() for i in items]
+    return with_etag(jsonify(data), etag), 200
 
 
 # --------- Thumbnails ---------
 @app.route("/api/games/<int:game_id>/thumbnail", methods=["PATCH"])
+@query_budget(3)
 def update_game_thumbnail(game_id):
     game = Game.query.get_or_404(game_id)
 
@@ -386,6 +783,8 @@ def update_game_thumbnail(game_id):
 
 
 @app.route("/api/games/<int:game_id>/thumbnail", methods=["GET"])
+@query_budget(1)
+@use_replica
 def get_game_thumbnail(game_id):
     game = Game.query.get_or_404(game_id)
     return jsonify({
@@ -396,6 +795,8 @@ def get_game_thumbnail(game_id):
 
 
 @app.route("/api/games/thumbnails", methods=["GET"])
+@query_budget(2)
+@use_replica
 def list_game_thumbnails():
     user_id = request.args.get("user_id", type=int)
 
@@ -403,6 +804,17 @@ def list_game_thumbnails():
     if user_id:
         q = q.filter_by(user_id=user_id)
 
+    # Any insert, delete or versioned write to the user's games changes this tag
+    count, max_id, versions = q.with_entities(
+        func.count(Game.game_id),
+        func.coalesce(func.max(Game.game_id), 0),
+        func.coalesce(func.sum(Game.version), 0),
+    ).one()
+    etag = f"thumbs-{user_id or 'all'}-{count}-{max_id}-{versions}"
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
     rows = (
         q.with_entities(Game.game_id, Game.thumbnail_url, Game.cover_url)
         .order_by(Game.game_id.desc())
@@ -413,61 +825,169 @@ def list_game_thumbnails():
         {"game_id": gid, "thumbnail_url": (thumb or cover or DEFAULT_THUMB), "cover_url": cover}
         for gid, thumb, cover in rows
     ]
-    return jsonify(data), 200
+    return with_etag(jsonify(data), etag), 200
 
 
 @app.route("/api/games/with-thumbnails", methods=["GET"])
+@query_budget(1)
+@use_replica
 def list_games_with_thumbnails():
     user_id = request.args.get("user_id", type=int)
+    fields = THUMBNAIL_GAME_FIELDS.requested()
 
-    q = db.session.query(Game)
+    q = db.session.query(*THUMBNAIL_GAME_FIELDS.columns(fields))
     if user_id is not None:
-        q = q.filter_by(user_id=user_id)
+        q = q.filter(Game.user_id == user_id)
+
+    return keyset_response(q, Game.game_id, THUMBNAIL_GAME_FIELDS.serializer(fields))
 
-    games = q.all()
-    return jsonify([
-        {
-            "game_id": g.game_id,
-            "user_id": g.user_id,
-            "title": g.title,
-            "platform": g.platform,
-            "genre": g.genre,
-            "run_type": g.run_type,
-            "tags": g.tags,
-            "cover_url": g.cover_url,
-            "thumbnail_url": (getattr(g, "thumbnail_url", None) or g.cover_url or DEFAULT_THUMB),
-        }
-        for g in games
-    ]), 200
+
+def _game_with_thumbnail(g):
+    return {
+        "game_id": g.game_id,
+        "user_id": g.user_id,
+        "title": g.title,
+        "platform": g.platform,
+        "genre": g.genre,
+        "run_type": g.run_type,
+        "tags": g.tags,
+        "cover_url": g.cover_url,
+        "thumbnail_url": g.thumbnail_url or g.cover_url or DEFAULT_THUMB,
+    }
+
+
+THUMBNAIL_GAME_FIELDS = Projection(
+    {
+        "game_id": Game.game_id,
+        "user_id": Game.user_id,
+        "title": Game.title,
+        "platform": Game.platform,
+        "genre": Game.genre,
+        "run_type": Game.run_type,
+        "tags": Game.tags,
+        "cover_url": Game.cover_url,
+        "thumbnail_url": (
+            (Game.thumbnail_url, Game.cover_url),
+            lambda g: g.thumbnail_url or g.cover_url or DEFAULT_THUMB,
+        ),
+    },
+    full=_game_with_thumbnail,
+    always=(Game.game_id,),
+)
 
 
 @app.route("/api/admin/thumbnails/backfill", methods=["POST"])
-def backfill_thumbnails():
+# A select and an update per chunk; a global sweep runs up to max_chunks of them
+@query_budget(2 * BACKFILL_MAX_CHUNKS_PER_REQUEST)
+def backfill_thumbnails_route():
     data = request.get_json(silent=True) or {}
 
     default_url = data.get("default_url")
     user_id = request.args.get("user_id", type=int)
+    start_after = data.get("start_after", request.args.get("start_after", 0, type=int))
+    max_chunks = data.get("max_chunks", BACKFILL_MAX_CHUNKS_PER_REQUEST)
+
+    if not isinstance(start_after, int) or not isinstance(max_chunks, int) or max_chunks < 1:
+        return jsonify({"message": "start_after and max_chunks must be integers"}), 400
+
+    if arg_flag("async"):
+        return job_accepted(enqueue("thumbnail_backfill", {
+            "default_url": default_url,
+            "user_id": user_id,
+            "start_after": start_after,
+        }))
+
+    # Call again with start_after=last_game_id until done is true
+    result = backfill_thumbnails(
+        default_url=default_url,
+        user_id=user_id,
+        start_after=start_after,
+        max_chunks=max_chunks,
+    )
+    return jsonify(result), 200
+
+
+@job_handler("thumbnail_backfill")
+def thumbnail_backfill_job(job):
+    payload = job.payload
+    # A retried job picks up from the last committed chunk
+    start_after = (job.progress or {}).get("last_game_id", payload.get("start_after", 0))
+    return backfill_thumbnails(
+        default_url=payload.get("default_url"),
+        user_id=payload.get("user_id"),
+        start_after=start_after,
+        on_progress=lambda progress: set_progress(job, progress),
+    )
 
-    q = Game.query
-    if user_id is not None:
-        q = q.filter(Game.user_id == user_id)
 
-    updated = 0
-    for g in q.all():
-        if getattr(g, "thumbnail_url", None):
-            continue
+@app.cli.command("backfill-thumbnails")
+@click.option("--default-url", default=None, help="Used when a game has no cover_url.")
+@click.option("--user-id", type=int, default=None)
+@click.option("--chunk-size", type=int, default=BACKFILL_CHUNK_SIZE, show_default=True)
+@click.option("--checkpoint", type=click.Path(dir_okay=False), default=None,
+              help="File holding the last processed game_id; resumed from and updated per chunk.")
+def backfill_thumbnails_command(default_url, user_id, chunk_size, checkpoint):
+    """Fill missing thumbnails in committed game_id chunks."""
+    start_after = 0
+    if checkpoint and os.path.exists(checkpoint):
+        with open(checkpoint) as f:
+            start_after = int(f.read().strip() or 0)
+
+    def report(progress):
+        if checkpoint:
+            with open(checkpoint, "w") as f:
+                f.write(str(progress["last_game_id"]))
+        click.echo(
+            f"up to game_id {progress['last_game_id']}: {progress['updated']} updated"
+        )
 
-        if getattr(g, "cover_url", None):
-            g.thumbnail_url = g.cover_url
-            updated += 1
-            continue
+    result = backfill_thumbnails(
+        default_url=default_url,
+        user_id=user_id,
+        start_after=start_after,
+        chunk_size=chunk_size,
+        on_progress=report,
+    )
+    click.echo(f"Done: {result['updated']} updated in {result['chunks']} chunk(s)")
 
-        if default_url:
-            g.thumbnail_url = default_url
-            updated += 1
 
-    db.session.commit()
-    return jsonify({"updated": updated}), 200
+# --------- Jobs ---------
+@app.route("/api/jobs/<int:job_id>", methods=["GET"])
+@query_budget(1)
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({"message": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@app.cli.command("jobs-worker")
+@click.option("--once", is_flag=True, help="Exit when the queue is empty.")
+@click.option("--poll-interval", type=float, default=None, help="Seconds between polls when idle.")
+def jobs_worker_command(once, poll_interval):
+    """Run queued background jobs."""
+    kwargs = {} if poll_interval is None else {"poll_interval": poll_interval}
+    processed = work(once=once, **kwargs)
+    click.echo(f"Processed {processed} job(s)")
+
+
+# --------- Admin ---------
+@app.route("/api/admin/cache/stats", methods=["GET"])
+@query_budget(0)
+def cache_stats():
+    return jsonify({"community_templates": template_cache.stats()}), 200
+
+
+@app.route("/api/admin/db/pool", methods=["GET"])
+@query_budget(0)
+def db_pool_stats():
+    return jsonify({"profile": engine_profile, "engines": pool_report(db.engines)}), 200
+
+
+@app.route("/api/admin/hashing/stats", methods=["GET"])
+@query_budget(0)
+def hashing_stats():
+    return jsonify(hashing.stats()), 200
 
 
 # --------- Error Handlers ---------
@@ -481,6 +1001,11 @@ def bad_request(_):
     return jsonify({"message": "Bad request"}), 400
 
 
+@app.errorhandler(FieldsError)
+def bad_fields(e):
+    return jsonify({"message": str(e)}), 400
+
+
 @app.errorhandler(500)
 def internal_error(_):
     return jsonify({"message": "Internal server error"}), 500
@@ -0,0 +1,306 @@
+"""Async serving mode.
+
+    uvicorn asgi:app --workers 4
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+
+The read-heavy GET endpoints below run as async handlers on an async engine
+(asyncpg, or aiosqlite for local SQLite), so a worker keeps many requests in
+flight while they wait on the database. Every other route is the unchanged
+Flask app, served through a2wsgi's thread pool. ``gunicorn app:app`` keeps
+working as before.
+
+Responses match the Flask handlers: same bodies, ETags, ?fields=, paging
+headers and replica routing.
+"""
+import os
+import time
+from contextlib import asynccontextmanager
+from functools import wraps
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route, request_response
+from werkzeug.http import parse_etags, quote_etag
+
+from app import (
+    app as flask_app,
+    allowed_origins,
+    db_url,
+    engine_profile,
+    normalize_db_url,
+    DEFAULT_THUMB,
+    MAX_PAGE_SIZE,
+    STREAM_BATCH_SIZE,
+    THUMBNAIL_GAME_FIELDS,
+)
+from checklist import CHECKLIST_FIELDS, checklist_select
+from engine_profiles import async_engine_args
+from metrics import REPLICA_FALLBACKS, REQUEST_COUNT, REQUEST_LATENCY
+from models import CommunityChecklist, Game, GAME_FIELDS, progress_percent
+from projection import FieldsError, Projection
+from replica import STICKY_HEADER, mark_replica_down, replica_down, replica_url, sticky
+from search import community_listing_fields, community_listing_select
+
+# Threads serving the Flask routes in each worker
+WSGI_THREADS = int(os.environ.get("ASGI_WSGI_THREADS", "10"))
+
+_url, _options = async_engine_args(db_url, engine_profile)
+engine = create_async_engine(_url, **_options)
+replica_engine = None
+if replica_url():
+    _replica_url, _replica_options = async_engine_args(normalize_db_url(replica_url()), engine_profile)
+    replica_engine = create_async_engine(_replica_url, **_replica_options)
+
+
+# --------- Helpers ---------
+def _json(data, status=200, headers=None):
+    # Encoded by the Flask app's JSON provider, so bodies match byte for byte
+    resp = Response(flask_app.json.response(data).get_data(), status_code=status, media_type="application/json")
+    resp.headers.update(headers or {})
+    return resp
+
+
+def _with_etag(resp, etag):
+    resp.headers["ETag"] = quote_etag(etag, weak=True)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+def _not_modified(request, etag):
+    if not parse_etags(request.headers.get("if-none-match")).contains_weak(etag):
+        return None
+    return _with_etag(Response(status_code=304), etag)
+
+
+def _int_arg(request, name):
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def _flag(request, name):
+    return (request.query_params.get(name) or "").strip().lower() in ("1", "true", "yes")
+
+
+def _read_engine(request):
+    if replica_engine is None or sticky(request) or replica_down():
+        return engine
+    return replica_engine
+
+
+async def _replica_reachable():
+    try:
+        async with replica_engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+    except OperationalError:
+        return False
+    return True
+
+
+async def _read(request, work):
+    """Run ``await work(conn)`` on the replica when allowed, else on the primary.
+
+    Mirrors replica.use_replica: a failed replica that also fails a ping is
+    skipped for a while and the read is retried on the primary.
+    """
+    chosen = _read_engine(request)
+    try:
+        async with chosen.connect() as conn:
+            return await work(conn)
+    except OperationalError as e:
+        if chosen is engine or await _replica_reachable():
+            raise
+        mark_replica_down(e)
+        REPLICA_FALLBACKS.inc()
+    async with engine.connect() as conn:
+        return await work(conn)
+
+
+def endpoint(name):
+    """Record metrics under the Flask endpoint name and turn FieldsError into a 400."""
+    def wrap(fn):
+        @wraps(fn)
+        async def handler(request):
+            started = time.perf_counter()
+            try:
+                resp = await fn(request)
+            except FieldsError as e:
+                resp = _json({"message": str(e)}, 400)
+            labels = (name, request.method, str(resp.status_code))
+            REQUEST_LATENCY.labels(*labels).observe(time.perf_counter() - started)
+            REQUEST_COUNT.labels(*labels).inc()
+            return resp
+        return handler
+    return wrap
+
+
+# --------- Pagination ---------
+async def _stream_json_array(request, stmt, serialize):
+    dumps = flask_app.json.dumps
+    async with _read_engine(request).connect() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        yield "["
+        first = True
+        async for row in result:
+            yield ("" if first else ",") + dumps(serialize(row))
+            first = False
+        yield "]"
+
+
+async def keyset_response(request, stmt, key_col, serialize):
+    """Async twin of app.keyset_response (cursor / limit / stream)."""
+    cursor = _int_arg(request, "cursor")
+    limit = _int_arg(request, "limit")
+
+    if cursor is not None:
+        stmt = stmt.where(key_col < cursor)
+    stmt = stmt.order_by(key_col.desc())
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if _flag(request, "stream"):
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return StreamingResponse(_stream_json_array(request, stmt, serialize), media_type="application/json")
+
+    if limit is None:
+        rows = await _read(request, lambda conn: _all(conn, stmt))
+        return _json([serialize(r) for r in rows])
+
+    rows = await _read(request, lambda conn: _all(conn, stmt.limit(limit + 1)))
+    headers = {"X-Next-Cursor": str(getattr(rows[limit - 1], key_col.key))} if len(rows) > limit else None
+    return _json([serialize(r) for r in rows[:limit]], headers=headers)
+
+
+async def _all(conn, stmt):
+    return (await conn.execute(stmt)).all()
+
+
+# --------- Games ---------
+@endpoint("list_games")
+async def list_games(request):
+    fields = GAME_FIELDS.requested(request.query_params)
+    stmt = select(*GAME_FIELDS.columns(fields))
+    user_id = _int_arg(request, "user_id")
+    if user_id is not None:
+        stmt = stmt.where(Game.user_id == user_id)
+    return await keyset_response(request, stmt, Game.game_id, GAME_FIELDS.serializer(fields))
+
+
+@endpoint("list_games_with_thumbnails")
+async def list_games_with_thumbnails(request):
+    fields = THUMBNAIL_GAME_FIELDS.requested(request.query_params)
+    stmt = select(*THUMBNAIL_GAME_FIELDS.columns(fields))
+    user_id = _int_arg(request, "user_id")
+    if user_id is not None:
+        stmt = stmt.where(Game.user_id == user_id)
+    return await keyset_response(request, stmt, Game.game_id, THUMBNAIL_GAME_FIELDS.serializer(fields))
+
+
+@endpoint("get_game")
+async def get_game(request):
+    game_id = request.path_params["game_id"]
+    fields = GAME_FIELDS.requested(request.query_params)
+    stmt = select(Game.version, *GAME_FIELDS.columns(fields)).where(Game.game_id == game_id)
+
+    game = (await _read(request, lambda conn: _all(conn, stmt)) or [None])[0]
+    if game is None:
+        return _json({"message": "Game not found"}, 404)
+
+    etag = f"game-{game_id}-{game.version}{Projection.etag_suffix(fields)}"
+    return _not_modified(request, etag) or _with_etag(_json(GAME_FIELDS.serializer(fields)(game)), etag)
+
+
+@endpoint("game_progress")
+async def game_progress(request):
+    game_id = request.path_params["game_id"]
+    stmt = select(Game.completed_items, Game.total_items).where(Game.game_id == game_id)
+
+    game = (await _read(request, lambda conn: _all(conn, stmt)) or [None])[0]
+    if game is None:
+        return _json({"message": "Game not found"}, 404)
+
+    return _json({
+        "game_id": game_id,
+        "completed": game.completed_items,
+        "total": game.total_items,
+        "percent": progress_percent(game.completed_items, game.total_items),
+    })
+
+
+# --------- Checklist ---------
+@endpoint("fetch_checklist")
+async def fetch_checklist(request):
+    game_id = request.path_params["game_id"]
+    fields = CHECKLIST_FIELDS.requested(request.query_params)
+
+    async def work(conn):
+        version = await conn.scalar(select(Game.version).where(Game.game_id == game_id))
+        etag = f"checklist-{game_id}-{version}{Projection.etag_suffix(fields)}"
+        if version is not None:
+            cached = _not_modified(request, etag)
+            if cached is not None:
+                return cached
+
+        serialize = CHECKLIST_FIELDS.serializer(fields)
+        rows = await conn.execute(checklist_select(game_id, fields))
+        resp = _json([serialize(row) for row in rows])
+        return _with_etag(resp, etag) if version is not None else resp
+
+    return await _read(request, work)
+
+
+# --------- Community ---------
+@endpoint("list_community_checklists")
+async def list_community_checklists(request):
+    listing = community_listing_fields(DEFAULT_THUMB)
+    fields = listing.requested(request.query_params)
+    stmt = community_listing_select(listing.columns(fields)).order_by(
+        CommunityChecklist.community_checklist_id.desc()
+    )
+
+    rows = await _read(request, lambda conn: _all(conn, stmt))
+    serialize = listing.serializer(fields)
+    return _json([serialize(t) for t in rows])
+
+
+# --------- App ---------
+def _route(path, handler):
+    # Same CORS policy Flask-CORS applies to /api/*; OPTIONS preflights fall through to Flask
+    cors = CORSMiddleware(
+        request_response(handler),
+        allow_origins=allowed_origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor", STICKY_HEADER],
+    )
+    return Route(path, cors, methods=["GET", "HEAD"])
+
+
+@asynccontextmanager
+async def lifespan(_):
+    yield
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+
+app = Starlette(
+    routes=[
+        _route("/api/games", list_games),
+        _route("/api/games/with-thumbnails", list_games_with_thumbnails),
+        _route("/api/games/{game_id:int}", get_game),
+        _route("/api/games/{game_id:int}/progress", game_progress),
+        _route("/api/games/{game_id:int}/checklist", fetch_checklist),
+        _route("/api/community", list_community_checklists),
+        # Everything else, including writes, is the Flask app
+        Mount("/", app=WSGIMiddleware(flask_app, workers=WSGI_THREADS)),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,129 @@
+"""Compare community import: per-row ORM copy vs. server-side INSERT ... SELECT.
+
+Usage:
+    python benchmarks/bench_import.py [--items 2000] [--repeat 5]
+
+Runs against DATABASE_URL, or a throwaway SQLite file when it is unset.
+Prints one JSON object with wall time and peak Python allocations per path.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.environ.get("DATABASE_URL"):
+    _fd, _path = tempfile.mkstemp(suffix=".db")
+    os.close(_fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_path}"
+
+from app import app  # noqa: E402
+from models import (  # noqa: E402
+    db,
+    User,
+    Game,
+    ChecklistItem,
+    CommunityChecklist,
+    CommunityChecklistItem,
+)
+
+
+def seed(items):
+    user = User(username="bench", email=f"bench-{time.time_ns()}@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+
+    template = CommunityChecklist(
+        title="Bench template",
+        created_by_user_id=user.user_id,
+        items_count=items,
+    )
+    db.session.add(template)
+    db.session.flush()
+
+    db.session.execute(
+        db.insert(CommunityChecklistItem),
+        [
+            {
+                "community_checklist_id": template.community_checklist_id,
+                "description": f"Collectible #{i}",
+                "order": i,
+            }
+            for i in range(1, items + 1)
+        ],
+    )
+    db.session.commit()
+    return user.user_id, template.community_checklist_id
+
+
+def legacy_import(user_id, template_id):
+    # The pre-change code path: load template.items and add one ORM object per row
+    template = db.session.get(CommunityChecklist, template_id)
+    new_game = Game(user_id=user_id, title=template.title)
+    db.session.add(new_game)
+    db.session.flush()
+
+    for itm in template.items:
+        db.session.add(
+            ChecklistItem(
+                game_id=new_game.game_id,
+                description=itm.description,
+                completed=False,
+                order=itm.order,
+            )
+        )
+    new_game.total_items = len(template.items)
+    db.session.commit()
+
+
+def endpoint_import(client, user_id, template_id):
+    resp = client.post(f"/api/community/import/{template_id}", json={"user_id": user_id})
+    assert resp.status_code == 201, resp.get_data(as_text=True)
+
+
+def measure(fn, repeat):
+    times, peaks = [], []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    times.sort()
+    return {
+        "median_ms": round(times[len(times) // 2] * 1000, 2),
+        "min_ms": round(times[0] * 1000, 2),
+        "peak_alloc_kb": round(max(peaks) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        user_id, template_id = seed(args.items)
+        client = app.test_client()
+
+        result = {
+            "items": args.items,
+            "repeat": args.repeat,
+            "dialect": db.engine.dialect.name,
+            "legacy_orm": measure(lambda: legacy_import(user_id, template_id), args.repeat),
+            "insert_select": measure(lambda: endpoint_import(client, user_id, template_id), args.repeat),
+        }
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
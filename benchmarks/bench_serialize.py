@@ -0,0 +1,147 @@
+"""Compare per-row cost of list serialization: ORM objects vs. column rows, stdlib json vs. orjson.
+
+Usage:
+    python benchmarks/bench_serialize.py [--games 5000] [--items 5000] [--repeat 7]
+
+Runs against DATABASE_URL, or a throwaway SQLite file when it is unset. Each
+path runs the query and builds the JSON response, as GET /api/games and
+GET /api/games/:id/checklist do. Prints one JSON object with microseconds per row.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.environ.get("DATABASE_URL"):
+    _fd, _path = tempfile.mkstemp(suffix=".db")
+    os.close(_fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_path}"
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+
+from app import app  # noqa: E402
+from json_provider import ORJSONProvider, orjson  # noqa: E402
+from models import db, User, Game, ChecklistItem, GAME_FIELDS, game_dict  # noqa: E402
+
+
+def seed(games, items):
+    user = User(username="bench", email=f"bench-{time.time_ns()}@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+
+    db.session.execute(
+        insert(Game),
+        [
+            {
+                "user_id": user.user_id,
+                "title": f"Game #{i}",
+                "platform": "PC",
+                "genre": "RPG",
+                "tags": "open-world,story",
+                "cover_url": f"https://img.example.com/{i}.jpg",
+                "total_items": 10,
+                "completed_items": i % 10,
+            }
+            for i in range(games)
+        ],
+    )
+    game_id = db.session.scalar(select(Game.game_id).where(Game.user_id == user.user_id).limit(1))
+    db.session.execute(
+        insert(ChecklistItem),
+        [
+            {"game_id": game_id, "description": f"Collectible #{i}", "completed": i % 3 == 0, "order": i}
+            for i in range(1, items + 1)
+        ],
+    )
+    db.session.commit()
+    return user.user_id, game_id
+
+
+def games_orm(user_id):
+    return [g.to_dict() for g in Game.query.filter_by(user_id=user_id).order_by(Game.game_id.desc())]
+
+
+def games_rows(user_id):
+    q = db.session.query(*GAME_FIELDS.columns()).filter(Game.user_id == user_id).order_by(Game.game_id.desc())
+    return [game_dict(r) for r in q]
+
+
+def checklist_orm(game_id):
+    items = ChecklistItem.query.filter_by(game_id=game_id).order_by(ChecklistItem.order).all()
+    return [
+        {"id": i.checklist_item_id, "description": i.description, "completed": i.completed, "order": i.order}
+        for i in items
+    ]
+
+
+def checklist_rows(game_id):
+    rows = db.session.execute(
+        select(
+            ChecklistItem.checklist_item_id.label("id"),
+            ChecklistItem.description,
+            ChecklistItem.completed,
+            ChecklistItem.order,
+        )
+        .where(ChecklistItem.game_id == game_id)
+        .order_by(ChecklistItem.order)
+    )
+    return [r._asdict() for r in rows]
+
+
+def measure(build, provider, rows, repeat):
+    times = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        t0 = time.perf_counter()
+        provider.response(build()).get_data()
+        times.append(time.perf_counter() - t0)
+        db.session.rollback()
+    times.sort()
+    return round(times[len(times) // 2] / rows * 1e6, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    providers = {"stdlib": DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers["orjson"] = ORJSONProvider(app)
+
+    with app.app_context():
+        db.create_all()
+        user_id, game_id = seed(args.games, args.items)
+
+        paths = {
+            "games": (args.games, {"orm": lambda: games_orm(user_id), "rows": lambda: games_rows(user_id)}),
+            "checklist": (
+                args.items,
+                {"orm": lambda: checklist_orm(game_id), "rows": lambda: checklist_rows(game_id)},
+            ),
+        }
+        result = {
+            "dialect": db.engine.dialect.name,
+            "repeat": args.repeat,
+            "us_per_row": {
+                name: {
+                    f"{kind}+{pname}": measure(build, provider, rows, args.repeat)
+                    for kind, build in builds.items()
+                    for pname, provider in providers.items()
+                }
+                for name, (rows, builds) in paths.items()
+            },
+        }
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
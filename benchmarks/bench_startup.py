@@ -0,0 +1,148 @@
+"""Cold start and per-worker memory: bare `gunicorn app:app` vs. gunicorn.conf.py.
+
+Usage:
+    python benchmarks/bench_startup.py [--workers 4] [--repeat 3]
+
+For each setup it starts gunicorn on a free local port, waits until every
+worker has booted and /metrics answers, then reads each worker's RSS, PSS
+(RSS with shared pages split between the processes sharing them) and USS
+(pages only that worker holds) from /proc. Also times a bare `import app`
+in a fresh interpreter. Linux only. Uses a throwaway SQLite file unless
+DATABASE_URL is set. Prints one JSON object.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SETUPS = {
+    # What the Procfile ran before: sync workers, each importing the app itself
+    "bare": ["gunicorn", "--config", "/dev/null", "--worker-class", "sync"],
+    "tuned": ["gunicorn", "--config", "gunicorn.conf.py"],
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _memory_kb(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            match = re.match(r"(\w+):\s+(\d+) kB", line)
+            if match:
+                fields[match.group(1)] = int(match.group(2))
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def _children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def import_seconds(env, repeat):
+    code = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+    runs = [
+        float(subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True,
+                             capture_output=True, text=True).stdout)
+        for _ in range(repeat)
+    ]
+    return round(statistics.median(runs), 3)
+
+
+def start(setup, workers, env):
+    port = _free_port()
+    cmd = [*SETUPS[setup], "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "app:app"]
+    env = {**env, "WEB_CONCURRENCY": str(workers)}
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+    booted = 0
+    while booted < workers:
+        line = proc.stderr.readline()
+        if not line:
+            raise RuntimeError(f"gunicorn ({setup}) exited before its workers booted")
+        booted += "Booting worker" in line
+
+    while True:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1).read()
+            break
+        except OSError:
+            time.sleep(0.01)
+    ready = time.perf_counter() - started
+
+    # Let every worker finish importing / serving before reading memory
+    for _ in range(workers * 4):
+        urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read()
+    time.sleep(0.5)
+    memory = [_memory_kb(pid) for pid in _children(proc.pid)]
+    master = _memory_kb(proc.pid)
+
+    proc.terminate()
+    proc.wait(timeout=30)
+    return ready, master, memory
+
+
+def measure(setup, workers, env, repeat):
+    readies, last = [], None
+    for _ in range(repeat):
+        ready, master, memory = start(setup, workers, env)
+        readies.append(ready)
+        last = (master, memory)
+
+    master, memory = last
+    return {
+        "cold_start_s": round(statistics.median(readies), 3),
+        "master_rss_mb": round(master["rss"] / 1024, 1),
+        "per_worker_mb": {
+            key: round(statistics.mean(m[key] for m in memory) / 1024, 1) for key in ("rss", "pss", "uss")
+        },
+        "total_pss_mb": round((master["pss"] + sum(m["pss"] for m in memory)) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    path = None
+    if not env.get("DATABASE_URL"):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        env["DATABASE_URL"] = f"sqlite:///{path}"
+
+    try:
+        result = {
+            "workers": args.workers,
+            "import_app_s": import_seconds(env, args.repeat),
+            **{setup: measure(setup, args.workers, env, args.repeat) for setup in SETUPS},
+        }
+    finally:
+        if path:
+            os.remove(path)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
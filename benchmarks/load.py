@@ -0,0 +1,213 @@
+"""Load driver for the main endpoints, reporting throughput and p50/p95/p99 latency.
+
+Usage:
+    python benchmarks/load.py [--requests 200] [--concurrency 4] [--output run.json]
+                              [--base-url http://localhost:8000] [seed options]
+
+Seeds fresh data (see benchmarks/seed.py) into DATABASE_URL, or a throwaway
+SQLite file when it is unset, then drives each endpoint. Without --base-url
+requests go through the Flask test client in-process; with it, over HTTP to
+a running server that shares the same database. Prints one JSON document
+so runs can be diffed across commits.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed import PASSWORD, add_arguments  # noqa: E402
+
+
+def _scenarios(ids):
+    users = ids["users"]
+    games = ids["game_ids"]
+    templates = ids["template_ids"]
+
+    def pick(rng, seq):
+        return seq[rng.randrange(len(seq))]
+
+    return {
+        "list_games": lambda rng: ("GET", f"/api/games?user_id={pick(rng, users)['user_id']}", None),
+        "get_checklist": lambda rng: ("GET", f"/api/games/{pick(rng, games)}/checklist", None),
+        "game_progress": lambda rng: ("GET", f"/api/games/{pick(rng, games)}/progress", None),
+        "list_community_checklists": lambda rng: ("GET", "/api/community", None),
+        "import_community_checklist": lambda rng: (
+            "POST",
+            f"/api/community/import/{pick(rng, templates)}",
+            {"user_id": pick(rng, users)["user_id"]},
+        ),
+        "login": lambda rng: (
+            "POST",
+            "/api/login",
+            {"email": pick(rng, users)["email"], "password": PASSWORD},
+        ),
+    }
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self._app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self._app.test_client()
+        resp = client.open(path, method=method, json=body)
+        resp.get_data()
+        return resp.status_code
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self._base = base_url.rstrip("/")
+
+    def request(self, method, path, body):
+        data = None if body is None else json.dumps(body).encode()
+        req = urllib.request.Request(
+            self._base + path, data=data, method=method, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def drive(client, make_request, requests, concurrency, rng_seed):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    per_thread = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+
+    def worker(n, seed):
+        rng = random.Random(seed)
+        local = []
+        local_errors = 0
+        for _ in range(n):
+            method, path, body = make_request(rng)
+            t0 = time.perf_counter()
+            status = client.request(method, path, body)
+            local.append(time.perf_counter() - t0)
+            if status >= 400:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(n, rng_seed + i)) for i, n in enumerate(per_thread)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda v: None if v is None else round(v * 1000, 3)  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the main endpoints.")
+    add_arguments(parser)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--endpoints", default=None, help="Comma-separated subset to run.")
+    parser.add_argument("--base-url", default=None, help="Drive a running server over HTTP.")
+    parser.add_argument("--output", "-o", default=None, help="Also write the JSON report here.")
+    args = parser.parse_args()
+
+    scratch = None
+    if not os.environ.get("DATABASE_URL"):
+        fd, scratch = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        os.environ["DATABASE_URL"] = f"sqlite:///{scratch}"
+
+    from app import app
+    from models import db
+    from seed import seed
+
+    try:
+        with app.app_context():
+            db.create_all()
+            t0 = time.perf_counter()
+            ids = seed(args.users, args.games, args.items, args.templates, args.template_items, args.seed)
+            seed_seconds = time.perf_counter() - t0
+            dialect = db.engine.dialect.name
+
+        client = HttpClient(args.base_url) if args.base_url else InProcessClient(app)
+        scenarios = _scenarios(ids)
+        if args.endpoints:
+            wanted = set(args.endpoints.split(","))
+            scenarios = {k: v for k, v in scenarios.items() if k in wanted}
+
+        results = {
+            name: drive(client, make, args.requests, args.concurrency, args.seed)
+            for name, make in scenarios.items()
+        }
+    finally:
+        if scratch:
+            os.remove(scratch)
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "dialect": dialect,
+        "target": args.base_url or "in-process",
+        "concurrency": args.concurrency,
+        "dataset": {
+            "users": args.users,
+            "games_per_user": args.games,
+            "items_per_game": args.items,
+            "templates": args.templates,
+            "items_per_template": args.template_items,
+            "seed_seconds": round(seed_seconds, 2),
+        },
+        "endpoints": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Synthetic data generator for benchmarks.
+
+Usage:
+    python benchmarks/seed.py [--users 10] [--games 50] [--items 100]
+                              [--templates 200] [--template-items 50] [--seed 1]
+
+Seeds DATABASE_URL (create_all first). Every user's password is "benchmark".
+Rows go in with bulk executemany inserts, so seeding 100k+ items takes seconds.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = "benchmark"
+PLATFORMS = ("PC", "PS5", "Switch", "Xbox Series", "Steam Deck")
+GENRES = ("RPG", "Metroidvania", "Platformer", "Shooter", "Puzzle", "Roguelike")
+RUN_TYPES = ("100%", "Any%", "Platinum", "Collectibles")
+
+
+def seed(users=10, games=50, items=100, templates=200, template_items=50, rng_seed=1):
+    """Insert ``users`` x ``games`` x ``items`` plus ``templates`` x ``template_items``.
+
+    Returns ids the load driver needs: user emails/ids, game ids and template ids.
+    """
+    from sqlalchemy import insert
+
+    from hashing import hash_password
+    from models import db, User, Game, ChecklistItem, CommunityChecklist, CommunityChecklistItem
+
+    rng = random.Random(rng_seed)
+    pw = hash_password(PASSWORD)  # one hash shared by every synthetic user
+
+    user_rows = [
+        {"username": f"bench{u}", "email": f"bench{u}-{rng_seed}@example.com", "password_hash": pw}
+        for u in range(users)
+    ]
+    user_ids = db.session.scalars(
+        insert(User).returning(User.user_id, sort_by_parameter_order=True), user_rows
+    ).all()
+
+    game_ids = []
+    for user_id in user_ids:
+        completed = [rng.randint(0, items) for _ in range(games)]
+        ids = db.session.scalars(
+            insert(Game).returning(Game.game_id, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": user_id,
+                    "title": f"Game {user_id}-{g}",
+                    "platform": rng.choice(PLATFORMS),
+                    "genre": rng.choice(GENRES),
+                    "run_type": rng.choice(RUN_TYPES),
+                    "tags": "benchmark",
+                    "cover_url": f"https://example.com/covers/{user_id}-{g}.png",
+                    "total_items": items,
+                    "completed_items": completed[g],
+                }
+                for g in range(games)
+            ],
+        ).all()
+        db.session.execute(
+            insert(ChecklistItem),
+            [
+                {
+                    "game_id": game_id,
+                    "description": f"Checklist item {i}",
+                    "completed": i < done,
+                    "order": (i + 1) * 1024,
+                }
+                for game_id, done in zip(ids, completed)
+                for i in range(items)
+            ],
+        )
+        db.session.commit()
+        game_ids.extend(ids)
+
+    template_ids = db.session.scalars(
+        insert(CommunityChecklist).returning(
+            CommunityChecklist.community_checklist_id, sort_by_parameter_order=True
+        ),
+        [
+            {
+                "title": f"Community {rng.choice(GENRES)} template {t}",
+                "description": "Synthetic benchmark template",
+                "platform": rng.choice(PLATFORMS),
+                "genre": rng.choice(GENRES),
+                "run_type": rng.choice(RUN_TYPES),
+                "tags": "benchmark,collectibles",
+                "created_by_user_id": rng.choice(user_ids),
+                "items_count": template_items,
+            }
+            for t in range(templates)
+        ],
+    ).all()
+    for start in range(0, len(template_ids), 100):
+        db.session.execute(
+            insert(CommunityChecklistItem),
+            [
+                {"community_checklist_id": t, "description": f"Step {i}", "order": i + 1}
+                for t in template_ids[start:start + 100]
+                for i in range(template_items)
+            ],
+        )
+    db.session.commit()
+
+    return {
+        "users": [{"user_id": i, "email": r["email"]} for i, r in zip(user_ids, user_rows)],
+        "game_ids": game_ids,
+        "template_ids": template_ids,
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--games", type=int, default=50, help="Games per user.")
+    parser.add_argument("--items", type=int, default=100, help="Checklist items per game.")
+    parser.add_argument("--templates", type=int, default=200)
+    parser.add_argument("--template-items", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1, help="RNG seed; also keeps emails unique per run.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic benchmark data.")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    from app import app
+    from models import db
+
+    with app.app_context():
+        db.create_all()
+        ids = seed(args.users, args.games, args.items, args.templates, args.template_items, args.seed)
+    print(json.dumps({k: len(v) for k, v in ids.items()}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import CommunityChecklist, CommunityChecklistItem
+
+log = logging.getLogger(__name__)
+
+# Without Redis each gunicorn worker has its own cache and an invalidation only
+# reaches the worker that made the write, so other workers may serve a stale
+# body until it expires. Keep local entries short-lived by default.
+LOCAL_CACHE_TTL = 5
+SHARED_CACHE_TTL = 300
+# Redis calls give up after this long; a failing Redis is then skipped for
+# CACHE_REDIS_RETRY_SECONDS and reads go straight to the database
+REDIS_TIMEOUT = float(os.environ.get("CACHE_REDIS_TIMEOUT", 0.25))
+REDIS_RETRY_SECONDS = int(os.environ.get("CACHE_REDIS_RETRY_SECONDS", 30))
+
+
+# --------- Backends ---------
+class LocalBackend:
+    """Dict-backed stand-in for a shared store; used in tests and single-process runs."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+
+class RedisBackend:
+    """Shares cached bodies across gunicorn workers. Needs the optional ``redis`` package.
+
+    Never raises for Redis failures: a failed get is a miss and a failed set
+    or delete is skipped, so an outage costs cache hits, not requests.
+    """
+
+    def __init__(self, url, prefix="completionist:"):
+        import redis
+
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=REDIS_TIMEOUT, socket_connect_timeout=REDIS_TIMEOUT
+        )
+        self._error = redis.RedisError
+        self._prefix = prefix
+        self._down_until = 0.0
+        self.errors = 0
+
+    def _call(self, method, key, *args, **kwargs):
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            return getattr(self._client, method)(self._prefix + key, *args, **kwargs)
+        except self._error as e:
+            self._failed(method, e)
+            return None
+
+    def _failed(self, method, error):
+        self.errors += 1
+        self._down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        log.warning("cache redis %s failed, skipping redis for %ss: %s", method, REDIS_RETRY_SECONDS, error)
+
+    def get(self, key):
+        return self._call("get", key)
+
+    def set(self, key, value, ttl):
+        self._call("set", key, value, ex=max(1, int(ttl)))
+
+    def delete(self, key):
+        self._call("delete", key)
+
+    def clear(self, prefix):
+        # SCAN, not KEYS, so a large keyspace does not block Redis
+        if time.monotonic() < self._down_until:
+            return
+        try:
+            keys = list(self._client.scan_iter(match=f"{self._prefix}{prefix}*", count=500))
+            if keys:
+                self._client.delete(*keys)
+        except self._error as e:
+            self._failed("clear", e)
+
+
+# --------- LRU/TTL cache ---------
+class LRUCache:
+    """Bounded LRU with a per-entry TTL and hit/miss/eviction counters.
+
+    With a shared ``backend`` the in-process layer is skipped, so an
+    invalidation in one worker is seen by all of them.
+    """
+
+    def __init__(self, maxsize=512, ttl=300, backend=None, namespace=""):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.namespace = namespace
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def _key(self, key):
+        return f"{self.namespace}{key}"
+
+    def get(self, key):
+        if self.backend is not None:
+            raw = self.backend.get(self._key(key))
+            with self._lock:
+                self._stats["hits" if raw is not None else "misses"] += 1
+            return None if raw is None else json.loads(raw)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def set(self, key, value):
+        if self.backend is not None:
+            self.backend.set(self._key(key), json.dumps(value), self.ttl)
+            return
+
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key):
+        if self.backend is not None:
+            self.backend.delete(self._key(key))
+        with self._lock:
+            self._entries.pop(key, None)
+            self._stats["invalidations"] += 1
+
+    def clear(self):
+        """Drop every entry in this cache's namespace, shared ones included."""
+        if self.backend is not None:
+            self.backend.clear(self.namespace)
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._stats)
+            out["size"] = len(self._entries)
+        lookups = out["hits"] + out["misses"]
+        out["hit_ratio"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        out["maxsize"] = self.maxsize
+        out["ttl"] = self.ttl
+        out["backend"] = type(self.backend).__name__ if self.backend is not None else "local"
+        out["backend_errors"] = getattr(self.backend, "errors", 0)
+        return out
+
+
+def _shared_backend():
+    url = os.environ.get("CACHE_REDIS_URL")
+    return RedisBackend(url) if url else None
+
+
+# Serialized GET /api/community/<id> bodies, keyed by template id: [etag, body]
+_template_backend = _shared_backend()
+template_cache = LRUCache(
+    maxsize=int(os.environ.get("COMMUNITY_CACHE_SIZE", 512)),
+    ttl=float(os.environ.get(
+        "COMMUNITY_CACHE_TTL", SHARED_CACHE_TTL if _template_backend is not None else LOCAL_CACHE_TTL
+    )),
+    backend=_template_backend,
+    namespace="community:",
+)
+
+
+# --------- Invalidation ---------
+# Template ids touched in a flush are collected per session and dropped from the
+# cache only once the transaction commits, so a concurrent read cannot re-cache
+# the pre-commit body.
+@event.listens_for(Session, "after_flush", propagate=True)
+def _collect_dirty_templates(session, flush_context):
+    touched = session.info.setdefault("community_dirty", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, CommunityChecklist):
+            touched.add(obj.community_checklist_id)
+        elif isinstance(obj, CommunityChecklistItem):
+            touched.add(obj.community_checklist_id)
+
+
+@event.listens_for(Session, "after_commit", propagate=True)
+def _invalidate_templates(session):
+    for template_id in session.info.pop("community_dirty", ()):
+        if template_id is not None:
+            template_cache.invalidate(template_id)
+
+
+@event.listens_for(Session, "after_rollback", propagate=True)
+def _discard_dirty_templates(session):
+    session.info.pop("community_dirty", None)
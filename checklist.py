@@ -1,13 +1,167 @@
+from bisect import bisect_right, insort
+
 from flask import request, jsonify
-from models import db, ChecklistItem
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from models import db, Game, ChecklistItem, Job
+from jobs import enqueue
+from http_cache import not_modified, with_etag
+from projection import Projection
+
+
+# --------- Checklist: Counters ---------
+def bump_game_counters(game_id, total=0, completed=0):
+    """Adjust a game's item counters and bump its version in the current transaction.
+
+    Every checklist write goes through here, so ``Game.version`` also serves
+    as the ETag for the game's checklist. The UPDATE also locks the game row
+    until commit. Returns False when the game does not exist.
+    """
+    return bool(db.session.query(Game).filter_by(game_id=game_id).update(
+        {
+            Game.total_items: Game.total_items + total,
+            Game.completed_items: Game.completed_items + completed,
+            Game.version: Game.version + 1,
+        },
+        synchronize_session=False,
+    ))
+
+
+def lock_game(game_id):
+    """Lock a game row (SELECT ... FOR UPDATE) and return its id, or None if it does not exist.
+
+    Checklist writes lock the game before reading or changing its items, here
+    or through bump_game_counters, so they serialize in one order and the
+    counter deltas they compute come from current rows. ``game_id`` may be a
+    scalar subquery.
+    """
+    return db.session.scalar(select(Game.game_id).where(Game.game_id == game_id).with_for_update())
+
+
+def _owner(item_id):
+    return select(ChecklistItem.game_id).where(ChecklistItem.checklist_item_id == item_id).scalar_subquery()
+
+
+def recount_progress(game_id=None):
+    """Recompute counters from checklist_item. Returns the number of games updated."""
+    total = (
+        select(func.count(ChecklistItem.checklist_item_id))
+        .where(ChecklistItem.game_id == Game.game_id)
+        .scalar_subquery()
+    )
+    completed = (
+        select(func.count(ChecklistItem.checklist_item_id))
+        .where(ChecklistItem.game_id == Game.game_id, ChecklistItem.completed.is_(True))
+        .scalar_subquery()
+    )
+
+    q = db.session.query(Game)
+    if game_id is not None:
+        q = q.filter(Game.game_id == game_id)
+
+    # Bump the version too, or cached ETags keep the repaired counters from clients
+    updated = q.update(
+        {Game.total_items: total, Game.completed_items: completed, Game.version: Game.version + 1},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    return updated
+
+
+# --------- Checklist: Ordering ---------
+# Orders are spaced ORDER_GAP apart so a move only rewrites the moved row;
+# a game is respaced in the background once a move leaves less than
+# REBALANCE_MIN_GAP next to the moved row.
+ORDER_GAP = 1024
+REBALANCE_MIN_GAP = 16
+
+
+def next_order(game_id):
+    # Callers bump_game_counters first: its UPDATE locks the game row, so a
+    # concurrent append waits and then sees this one's max instead of reusing it
+    last = (
+        db.session.query(func.max(ChecklistItem.order))
+        .filter(ChecklistItem.game_id == game_id)
+        .scalar()
+    )
+    return (last or 0) + ORDER_GAP
+
+
+def rebalance_orders(game_id):
+    """Respace a game's items ORDER_GAP apart, keeping their current sequence."""
+    # Lock the game row before reading the items, so no append or move can
+    # commit between the read and the rewrite
+    bump_game_counters(game_id)
+    ids = db.session.scalars(
+        select(ChecklistItem.checklist_item_id)
+        .where(ChecklistItem.game_id == game_id)
+        .order_by(ChecklistItem.order.asc().nulls_last(), ChecklistItem.checklist_item_id)
+    ).all()
+    if not ids:
+        return 0
+
+    # Clear first so no intermediate state trips uq_checklist_order_per_game
+    db.session.execute(
+        update(ChecklistItem).where(ChecklistItem.game_id == game_id).values(order=None),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.execute(
+        update(ChecklistItem),
+        [{"checklist_item_id": item_id, "order": n * ORDER_GAP} for n, item_id in enumerate(ids, 1)],
+    )
+    return len(ids)
+
+
+def queue_rebalance(game_id):
+    """Queue a background respace of ``game_id`` unless one is already waiting. Returns the job id."""
+    pending = db.session.execute(
+        select(Job.job_id, Job.payload).where(Job.kind == "rebalance_orders", Job.status == "queued")
+    ).all()
+    for job_id, payload in pending:
+        if payload.get("game_id") == game_id:
+            return job_id
+    return enqueue("rebalance_orders", {"game_id": game_id}).job_id
+
+
+def _order_slot(orders, after):
+    """Pick an order between ``after`` (None = top) and its successor in ``orders``.
+
+    ``orders`` is the sorted orders of the other items. Returns (order, room)
+    where room is the distance to the nearer neighbour, or None if there is
+    no integer left between them.
+    """
+    if after is None:
+        if not orders:
+            return ORDER_GAP, ORDER_GAP
+        lo, hi = orders[0] - 2 * ORDER_GAP, orders[0]
+    else:
+        i = bisect_right(orders, after)
+        if i == len(orders):
+            return after + ORDER_GAP, ORDER_GAP
+        lo, hi = after, orders[i]
+
+    slot = (lo + hi) // 2
+    return (slot, min(slot - lo, hi - slot)) if lo < slot < hi else None
 
 
 # --------- Checklist: Create ---------
 def add_checklist_item(game_id):
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     description = data.get("description")
     order = data.get("order", None)
 
+    if not isinstance(description, str) or not description.strip():
+        return jsonify({"message": "non-empty description is required"}), 400
+    if order is not None and not _is_int(order):
+        return jsonify({"message": "order must be an integer"}), 400
+    description = description.strip()
+
+    if not bump_game_counters(game_id, total=1):
+        db.session.rollback()
+        return jsonify({"message": "Game not found"}), 404
+    if order is None:
+        order = next_order(game_id)
+
     item = ChecklistItem(
         game_id=game_id,
         description=description,
@@ -16,49 +170,334 @@ def add_checklist_item(game_id):
     )
 
     db.session.add(item)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Input and the game were checked above and the game row is locked,
+        # so only uq_checklist_order_per_game is left to fail
+        db.session.rollback()
+        return jsonify({"message": "order is already taken in this checklist"}), 409
 
     return jsonify({"message": "Checklist item added"}), 201
 
 
 # --------- Checklist: Read ---------
+CHECKLIST_FIELDS = Projection(
+    {
+        "id": ChecklistItem.checklist_item_id.label("id"),
+        "description": ChecklistItem.description,
+        "completed": ChecklistItem.completed,
+        "order": ChecklistItem.order,
+    },
+    full=lambda row: row._asdict(),
+)
+
+
+def checklist_select(game_id, fields=None):
+    # Served straight from the (game_id, order) unique index
+    return (
+        select(*CHECKLIST_FIELDS.columns(fields))
+        .where(ChecklistItem.game_id == game_id)
+        .order_by(ChecklistItem.order.asc().nulls_last(), ChecklistItem.checklist_item_id)
+    )
+
+
 def get_checklist(game_id):
-    items = ChecklistItem.query.filter_by(game_id=game_id).all()
-    checklist = [
-        {
-            "id": item.checklist_item_id,
-            "description": item.description,
-            "completed": item.completed,
-            "order": item.order,
-        }
-        for item in items
-    ]
-    return jsonify(checklist)
+    fields = CHECKLIST_FIELDS.requested()
+    version = db.session.scalar(select(Game.version).where(Game.game_id == game_id))
+    etag = f"checklist-{game_id}-{version}{Projection.etag_suffix(fields)}"
+    if version is not None:
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
+    # Plain rows rather than ChecklistItem objects: nothing here is modified
+    rows = db.session.execute(checklist_select(game_id, fields))
+    serialize = CHECKLIST_FIELDS.serializer(fields)
+    resp = jsonify([serialize(row) for row in rows])
+    return with_etag(resp, etag) if version is not None else resp
 
 
 # --------- Checklist: Update ---------
 def update_checklist_item(item_id):
     data = request.get_json()
-    item = ChecklistItem.query.get(item_id)
+    # The item is read after the lock, so was_completed cannot be stale
+    item = ChecklistItem.query.get(item_id) if lock_game(_owner(item_id)) is not None else None
 
     if not item:
         return jsonify({"message": "Item not found"}), 404
 
+    was_completed = bool(item.completed)
     item.description = data.get("description", item.description)
     item.completed = data.get("completed", item.completed)
     item.order = data.get("order", item.order)
 
+    bump_game_counters(item.game_id, completed=int(bool(item.completed)) - int(was_completed))
     db.session.commit()
     return jsonify({"message": "Checklist item updated"}), 200
 
 
 # --------- Checklist: Delete ---------
 def delete_checklist_item(item_id):
-    item = ChecklistItem.query.get(item_id)
+    game_id = lock_game(_owner(item_id))
+    deleted = db.session.execute(
+        delete(ChecklistItem)
+        .where(ChecklistItem.checklist_item_id == item_id)
+        .returning(ChecklistItem.completed),
+        execution_options={"synchronize_session": False},
+    ).first() if game_id is not None else None
 
-    if not item:
+    if deleted is None:
+        db.session.rollback()
         return jsonify({"message": "Item not found"}), 404
 
-    db.session.delete(item)
+    bump_game_counters(game_id, total=-1, completed=-int(bool(deleted.completed)))
     db.session.commit()
     return jsonify({"message": "Checklist item deleted"}), 200
+
+
+# --------- Checklist: Batch ---------
+MAX_BATCH_OPS = 1000
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _item_id(entry):
+    if isinstance(entry, dict):
+        entry = entry.get("id", entry.get("checklist_item_id"))
+    return entry if _is_int(entry) else None
+
+
+def _valid_fields(entry):
+    """False when a description or order in ``entry`` has the wrong type."""
+    if "description" in entry and not isinstance(entry["description"], str):
+        return False
+    return entry.get("order") is None or _is_int(entry["order"])
+
+
+def batch_checklist(game_id):
+    """Apply creates, updates and deletes for one game in a single transaction.
+
+    Body: {"create": [{"description", "order"?, "completed"?}],
+           "update": [{"id", "description"?, "completed"?, "order"?}],
+           "delete": [id, ...]}
+    """
+    data = request.get_json(silent=True) or {}
+    creates = data.get("create") or []
+    updates = data.get("update") or []
+    deletes = data.get("delete") or []
+
+    if not all(isinstance(v, list) for v in (creates, updates, deletes)):
+        return jsonify({"message": "create, update and delete must be lists"}), 400
+    if len(creates) + len(updates) + len(deletes) > MAX_BATCH_OPS:
+        return jsonify({"message": f"at most {MAX_BATCH_OPS} operations per batch"}), 400
+
+    if lock_game(game_id) is None:
+        return jsonify({"message": "Game not found"}), 404
+
+    # One lookup covers every item the batch refers to; the game lock keeps
+    # their completed flags current until commit
+    ids = {i for i in map(_item_id, updates + deletes) if i is not None}
+    existing = dict(
+        db.session.execute(
+            select(ChecklistItem.checklist_item_id, ChecklistItem.completed).where(
+                ChecklistItem.game_id == game_id,
+                ChecklistItem.checklist_item_id.in_(ids),
+            )
+        ).all()
+    ) if ids else {}
+
+    results = []
+    total_delta = 0
+    completed_delta = 0
+
+    delete_ids = []
+    for entry in deletes:
+        item_id = _item_id(entry)
+        if item_id is None:
+            results.append({"op": "delete", "id": entry, "status": "invalid"})
+        elif item_id not in existing or item_id in delete_ids:
+            results.append({"op": "delete", "id": item_id, "status": "not_found"})
+        else:
+            delete_ids.append(item_id)
+            total_delta -= 1
+            completed_delta -= int(bool(existing[item_id]))
+            results.append({"op": "delete", "id": item_id, "status": "ok"})
+
+    update_rows = []
+    for entry in updates:
+        item_id = _item_id(entry) if isinstance(entry, dict) else None
+        if item_id is None:
+            results.append({"op": "update", "id": None, "status": "invalid"})
+            continue
+        if item_id not in existing or item_id in delete_ids:
+            results.append({"op": "update", "id": item_id, "status": "not_found"})
+            continue
+
+        if not _valid_fields(entry) or ("description" in entry and not entry["description"].strip()):
+            results.append({"op": "update", "id": item_id, "status": "invalid"})
+            continue
+
+        row = {"checklist_item_id": item_id}
+        for key in ("description", "order", "completed"):
+            if key in entry:
+                row[key] = entry[key]
+        if len(row) == 1:
+            results.append({"op": "update", "id": item_id, "status": "invalid"})
+            continue
+
+        if "completed" in row:
+            row["completed"] = bool(row["completed"])
+            completed_delta += int(row["completed"]) - int(bool(existing[item_id]))
+            existing[item_id] = row["completed"]
+
+        update_rows.append(row)
+        results.append({"op": "update", "id": item_id, "status": "ok"})
+
+    insert_rows = []
+    created = []
+    for entry in creates:
+        valid = isinstance(entry, dict) and isinstance(entry.get("description"), str) and _valid_fields(entry)
+        desc = entry["description"].strip() if valid else ""
+        if not desc:
+            results.append({"op": "create", "id": None, "status": "invalid"})
+            continue
+        completed = bool(entry.get("completed", False))
+        order = entry.get("order")
+        insert_rows.append({
+            "game_id": game_id,
+            "description": desc,
+            "completed": completed,
+            "order": order,
+        })
+        total_delta += 1
+        completed_delta += int(completed)
+        created.append({"op": "create", "id": None, "status": "ok"})
+        results.append(created[-1])
+
+    try:
+        bump_game_counters(game_id, total=total_delta, completed=completed_delta)
+        if delete_ids:
+            db.session.execute(
+                delete(ChecklistItem).where(ChecklistItem.checklist_item_id.in_(delete_ids)),
+                execution_options={"synchronize_session": False},
+            )
+        if update_rows:
+            db.session.execute(update(ChecklistItem), update_rows)
+        appended = [row for row in insert_rows if row["order"] is None]
+        if appended:
+            start = next_order(game_id)
+            for n, row in enumerate(appended):
+                row["order"] = start + n * ORDER_GAP
+        if insert_rows:
+            # Orders are unique per game, so they map new ids back to their entries
+            # without forcing RETURNING into parameter order (row-at-a-time on SQLite)
+            new_ids = dict(
+                (order, item_id)
+                for item_id, order in db.session.execute(
+                    insert(ChecklistItem).returning(
+                        ChecklistItem.checklist_item_id, ChecklistItem.order
+                    ),
+                    insert_rows,
+                )
+            )
+            for res, row in zip(created, insert_rows):
+                res["id"] = new_ids.get(row["order"])
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "batch conflicts with existing checklist order"}), 409
+
+    return jsonify({
+        "results": results,
+        "created": len(insert_rows),
+        "updated": len(update_rows),
+        "deleted": len(delete_ids),
+    }), 200
+
+
+# --------- Checklist: Reorder ---------
+def reorder_checklist(game_id):
+    """Move items within a game.
+
+    Body: {"moves": [{"id": item_id, "after": item_id or null}]}; ``after: null``
+    moves the item to the top. Only the moved rows are rewritten. A move
+    that leaves little room queues a background respace of the game; one
+    with no room left at all answers 409 after queueing it, and the client
+    retries once the job has run.
+    """
+    data = request.get_json(silent=True) or {}
+    moves = data.get("moves")
+
+    if not isinstance(moves, list) or not moves:
+        return jsonify({"message": "moves must be a non-empty list"}), 400
+    if len(moves) > MAX_BATCH_OPS:
+        return jsonify({"message": f"at most {MAX_BATCH_OPS} moves per request"}), 400
+
+    # Locks the game row, so moves and the respace job never interleave
+    if not bump_game_counters(game_id):
+        db.session.rollback()
+        return jsonify({"message": "Game not found"}), 404
+
+    # One read of the game's orders; every move is then placed in memory,
+    # so the statement count does not grow with the number of moves
+    order_of = dict(db.session.execute(
+        select(ChecklistItem.checklist_item_id, ChecklistItem.order)
+        .where(ChecklistItem.game_id == game_id)
+    ).all())
+    orders = sorted(o for o in order_of.values() if o is not None)
+
+    crowded = False
+    moved = []
+    for move in moves:
+        item_id = _item_id(move) if isinstance(move, dict) else None
+        after_id = move.get("after") if isinstance(move, dict) else None
+        if item_id is None or (after_id is not None and _item_id(after_id) is None):
+            db.session.rollback()
+            return jsonify({"message": "each move needs an integer id and after"}), 400
+
+        if item_id not in order_of or (after_id is not None and after_id not in order_of) or after_id == item_id:
+            db.session.rollback()
+            return jsonify({"message": "Item not found", "id": item_id}), 404
+
+        if order_of[item_id] is not None:
+            orders.remove(order_of[item_id])
+        after = None if after_id is None else order_of[after_id]
+        # An unplaced (NULL) anchor has no successor to split against
+        found_slot = None if after_id is not None and after is None else _order_slot(orders, after)
+        if found_slot is None:
+            db.session.rollback()
+            job_id = queue_rebalance(game_id)
+            status_url = f"/api/jobs/{job_id}"
+            resp = jsonify({
+                "message": "No room left between these items; the checklist is being respaced, retry shortly",
+                "job_id": job_id,
+                "status_url": status_url,
+            })
+            resp.headers["Location"] = status_url
+            resp.headers["Retry-After"] = "1"
+            return resp, 409
+        slot, room = found_slot
+        crowded = crowded or room < REBALANCE_MIN_GAP
+
+        insort(orders, slot)
+        order_of[item_id] = slot
+        moved.append({"id": item_id, "order": slot})
+
+    # Last move of each item wins. Clear the moved rows first, since a slot
+    # may be one another moved row still holds until its own update runs
+    final = {m["id"]: m["order"] for m in moved}
+    db.session.execute(
+        update(ChecklistItem).where(ChecklistItem.checklist_item_id.in_(final)).values(order=None),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.execute(
+        update(ChecklistItem),
+        [{"checklist_item_id": item_id, "order": order} for item_id, order in final.items()],
+    )
+
+    db.session.commit()
+    rebalance_job_id = queue_rebalance(game_id) if crowded else None
+    return jsonify({"moved": moved, "rebalance_job_id": rebalance_job_id}), 200
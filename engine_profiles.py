@@ -0,0 +1,244 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+# Named engine/pool setups, picked with DB_ENGINE_PROFILE. Any key can be
+# overridden with its DB_* environment variable (see ENV_OVERRIDES).
+#
+# pre_ping: "always" pings on every checkout (one extra round-trip), "none"
+# relies on pool_recycle and on invalidation after a failed statement.
+ENGINE_PROFILES = {
+    # What the service always ran with
+    "default": {
+        "pool": "queue",
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_recycle": 300,
+        "pre_ping": "always",
+        "statement_timeout_ms": None,
+    },
+    # Request workers: fail fast when the pool is exhausted, cap runaway queries
+    "web": {
+        "pool": "queue",
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 5,
+        "pool_recycle": 300,
+        "pre_ping": "none",
+        "statement_timeout_ms": 15000,
+    },
+    # Job workers and CLI: few connections, long statements allowed
+    "worker": {
+        "pool": "queue",
+        "pool_size": 2,
+        "max_overflow": 0,
+        "pool_timeout": 60,
+        "pool_recycle": 1800,
+        "pre_ping": "always",
+        "statement_timeout_ms": None,
+    },
+    # PgBouncer in transaction mode does the pooling. Keep no connections
+    # client-side and never rely on server-side prepared statements, since
+    # consecutive transactions may land on different server connections.
+    # Startup options are rejected there, so set statement_timeout on the role.
+    "pgbouncer": {
+        "pool": "null",
+        "pool_recycle": -1,
+        "pre_ping": "none",
+        "statement_timeout_ms": None,
+        "disable_prepared_statements": True,
+    },
+}
+
+ENV_OVERRIDES = {
+    "pool_size": ("DB_POOL_SIZE", int),
+    "max_overflow": ("DB_MAX_OVERFLOW", int),
+    "pool_timeout": ("DB_POOL_TIMEOUT", float),
+    "pool_recycle": ("DB_POOL_RECYCLE", int),
+    "pre_ping": ("DB_PRE_PING", str),
+    "statement_timeout_ms": ("DB_STATEMENT_TIMEOUT_MS", int),
+}
+
+
+def resolve_profile(name=None, env=os.environ):
+    name = name or env.get("DB_ENGINE_PROFILE", "default")
+    if name not in ENGINE_PROFILES:
+        raise ValueError(f"unknown DB_ENGINE_PROFILE {name!r}; choose from {sorted(ENGINE_PROFILES)}")
+
+    profile = dict(ENGINE_PROFILES[name], name=name)
+    for key, (var, cast) in ENV_OVERRIDES.items():
+        if env.get(var):
+            profile[key] = cast(env[var])
+    return profile
+
+
+def engine_options(url, profile):
+    """Translate a profile into SQLALCHEMY_ENGINE_OPTIONS for ``url``."""
+    if url.startswith("sqlite"):
+        # SQLite picks its own pool; sizing and timeouts do not apply
+        return {}
+
+    options = {
+        "pool_pre_ping": profile["pre_ping"] == "always",
+        "pool_recycle": profile["pool_recycle"],
+    }
+    if profile["pool"] == "null":
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=profile["pool_size"],
+            max_overflow=profile["max_overflow"],
+            pool_timeout=profile["pool_timeout"],
+        )
+
+    connect_args = {}
+    if profile.get("statement_timeout_ms"):
+        connect_args["options"] = f"-c statement_timeout={int(profile['statement_timeout_ms'])}"
+    if profile.get("disable_prepared_statements") and url.startswith("postgresql+psycopg:"):
+        # psycopg 3 prepares repeated statements server-side; psycopg2 never does
+        connect_args["prepare_threshold"] = None
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def async_engine_args(url, profile):
+    """(url, options) for create_async_engine: asyncpg for Postgres, aiosqlite for SQLite."""
+    u = make_url(url)
+    if u.get_backend_name() == "sqlite":
+        return u.set(drivername="sqlite+aiosqlite"), {}
+
+    query = dict(u.query)
+    connect_args = {}
+    # asyncpg has no sslmode parameter; its ssl argument takes the same values
+    if "sslmode" in query:
+        connect_args["ssl"] = query.pop("sslmode")
+    if profile.get("statement_timeout_ms"):
+        connect_args["server_settings"] = {"statement_timeout": str(int(profile["statement_timeout_ms"]))}
+    if profile.get("disable_prepared_statements"):
+        # asyncpg prepares every statement; turn off both its cache and SQLAlchemy's
+        connect_args["statement_cache_size"] = 0
+        query["prepared_statement_cache_size"] = "0"
+
+    options = {
+        "pool_pre_ping": profile["pre_ping"] == "always",
+        "pool_recycle": profile["pool_recycle"],
+    }
+    if profile["pool"] == "null":
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            pool_size=profile["pool_size"],
+            max_overflow=profile["max_overflow"],
+            pool_timeout=profile["pool_timeout"],
+        )
+    if connect_args:
+        options["connect_args"] = connect_args
+    return u.set(drivername="postgresql+asyncpg", query=query), options
+
+
+# --------- Pool statistics ---------
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "connects": 0,
+            "checkouts": 0,
+            "checkins": 0,
+            "invalidations": 0,
+            "soft_invalidations": 0,
+            "closes": 0,
+            "peak_overflow": 0,
+        }
+        self.wait_count = 0
+        self.wait_seconds = 0.0
+        self.wait_max_seconds = 0.0
+
+    def incr(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def waited(self, seconds):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_seconds += seconds
+            self.wait_max_seconds = max(self.wait_max_seconds, seconds)
+
+    def overflow(self, value):
+        with self._lock:
+            self.counters["peak_overflow"] = max(self.counters["peak_overflow"], value)
+
+    def snapshot(self, pool):
+        with self._lock:
+            out = dict(self.counters)
+            out["checkout_wait"] = {
+                "count": self.wait_count,
+                "total_seconds": round(self.wait_seconds, 6),
+                "avg_ms": round(self.wait_seconds / self.wait_count * 1000, 3) if self.wait_count else 0.0,
+                "max_ms": round(self.wait_max_seconds * 1000, 3),
+            }
+        out["pool"] = type(pool).__name__
+        for attr in ("size", "checkedin", "checkedout", "overflow"):
+            fn = getattr(pool, attr, None)
+            if fn is not None:
+                out[attr] = max(fn(), 0)
+        return out
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a connection."""
+
+    stats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.stats is not None:
+                self.stats.waited(time.perf_counter() - start)
+                self.stats.overflow(self.overflow())
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+_pool_stats = {}
+
+
+def init_pool_stats(engines):
+    """Attach counters to each engine's pool. ``engines`` maps a name to an Engine."""
+    for name, engine in engines.items():
+        key = name or "default"
+        if key in _pool_stats:
+            continue
+        stats = _pool_stats[key] = PoolStats()
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.stats = stats
+
+        for event_name, counter in (
+            ("connect", "connects"),
+            ("checkout", "checkouts"),
+            ("checkin", "checkins"),
+            ("invalidate", "invalidations"),
+            ("soft_invalidate", "soft_invalidations"),
+            ("close", "closes"),
+        ):
+            event.listen(engine, event_name, lambda *_, c=counter, s=stats: s.incr(c))
+
+
+def pool_report(engines):
+    return {
+        (name or "default"): _pool_stats[name or "default"].snapshot(engine.pool)
+        for name, engine in engines.items()
+        if (name or "default") in _pool_stats
+    }
@@ -0,0 +1,89 @@
+"""Gunicorn settings for the web process (gunicorn -c gunicorn.conf.py app:app).
+
+Every value can be overridden from the environment, see README "Serving".
+"""
+import gc
+import glob
+import multiprocessing
+import os
+import sys
+import tempfile
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name) or default)
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Requests mostly wait on Postgres, so a few processes with several threads
+# each beat many single-threaded ones on memory. WEB_CONCURRENCY is the
+# platform's usual knob for the process count.
+workers = _env_int("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, _env_int("MAX_WEB_WORKERS", 8)))
+threads = _env_int("GUNICORN_THREADS", 4)
+worker_class = "gthread" if threads > 1 else "sync"
+
+# Import the app once in the master; workers fork with its modules already
+# loaded and share those pages copy-on-write
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+# Recycle workers now and then so slow leaks cannot build up; the jitter
+# keeps them from all restarting at once
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 2000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 200)
+
+timeout = _env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 25)
+keepalive = _env_int("GUNICORN_KEEPALIVE", 5)
+
+# Heartbeat files on tmpfs, not a possibly slow container disk
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+# One connection per thread is what a worker can use at once
+os.environ.setdefault("DB_POOL_SIZE", str(threads))
+
+# /metrics has to aggregate all workers; this must be set before the app imports prometheus_client
+if workers > 1:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="prometheus-"))
+
+
+def on_starting(server):
+    # Samples left from a previous run would be summed into this one
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+            os.remove(path)
+
+
+def when_ready(server):
+    # Move everything the preloaded app allocated out of the collector's
+    # reach; otherwise the first collection in each worker writes to (and
+    # so copies) nearly every shared page
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    # Pooled connections opened in the master must not be shared with the
+    # children. close=False leaves the parent's sockets alone and gives this
+    # worker a fresh pool.
+    app_module = sys.modules.get("app")
+    if app_module is not None:
+        with app_module.app.app_context():
+            for engine in app_module.db.engines.values():
+                engine.dispose(close=False)
+
+    asgi_module = sys.modules.get("asgi")
+    if asgi_module is not None:
+        for engine in (asgi_module.engine, asgi_module.replica_engine):
+            if engine is not None:
+                engine.sync_engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
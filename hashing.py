@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from metrics import PASSWORD_HASH_SECONDS
+
+# Werkzeug method string, e.g. "scrypt", "scrypt:32768:8:1" or "pbkdf2:sha256:600000".
+# Changing it makes existing hashes get upgraded on the user's next login.
+HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+HASH_SALT_LENGTH = int(os.environ.get("PASSWORD_HASH_SALT_LENGTH", 16))
+
+# Hashes run on the request thread; a pool would only hand the work to another
+# thread while this one waits. What is bounded is how many request threads of
+# this process may be hashing at once (HASH_CONCURRENCY) or waiting for a turn
+# (HASH_QUEUE_DEPTH). Anything beyond that, or a wait over HASH_TIMEOUT seconds,
+# is rejected, so a burst of logins cannot occupy every thread of a worker.
+# Per process: keep the sum below the worker's thread count (GUNICORN_THREADS,
+# default 4).
+HASH_CONCURRENCY = int(os.environ.get("HASH_CONCURRENCY", 2))
+HASH_QUEUE_DEPTH = int(os.environ.get("HASH_QUEUE_DEPTH", 1))
+HASH_TIMEOUT = float(os.environ.get("HASH_TIMEOUT", 5))
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full or a turn did not come within HASH_TIMEOUT."""
+
+
+_lock = threading.Lock()
+_running = threading.BoundedSemaphore(HASH_CONCURRENCY)
+_admitted = threading.BoundedSemaphore(HASH_CONCURRENCY + HASH_QUEUE_DEPTH)
+_method_prefix = None
+_stats = {
+    "count": 0,
+    "rejected": 0,
+    "sum_seconds": 0.0,
+    "max_seconds": 0.0,
+    "buckets": [0] * len(LATENCY_BUCKETS),
+}
+
+
+def _record(seconds):
+    PASSWORD_HASH_SECONDS.observe(seconds)
+    with _lock:
+        _stats["count"] += 1
+        _stats["sum_seconds"] += seconds
+        _stats["max_seconds"] = max(_stats["max_seconds"], seconds)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                _stats["buckets"][i] += 1
+                break
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _record(time.perf_counter() - start)
+
+
+def _reject():
+    with _lock:
+        _stats["rejected"] += 1
+    raise HashingBusy()
+
+
+def _run(fn, *args, **kwargs):
+    if not _admitted.acquire(blocking=False):
+        _reject()
+    try:
+        if not _running.acquire(timeout=HASH_TIMEOUT):
+            _reject()
+        try:
+            return _timed(fn, *args, **kwargs)
+        finally:
+            _running.release()
+    finally:
+        _admitted.release()
+
+
+# --------- Public API ---------
+def hash_password(password):
+    return _run(
+        generate_password_hash, password, method=HASH_METHOD, salt_length=HASH_SALT_LENGTH
+    )
+
+
+def verify_password(pwhash, password):
+    return _run(check_password_hash, pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """True when ``pwhash`` was made with other parameters than HASH_METHOD and HASH_SALT_LENGTH.
+
+    Werkzeug hashes read "method:param:...$salt$hash", so the full parameter
+    string (work factors, iterations) and the salt length are compared.
+    """
+    global _method_prefix
+    if _method_prefix is None:
+        # Let werkzeug expand defaults (e.g. "scrypt" -> "scrypt:32768:8:1")
+        _method_prefix = generate_password_hash(
+            "", method=HASH_METHOD, salt_length=1
+        ).split("$", 1)[0]
+    method, salt, _ = (pwhash.split("$", 2) + ["", ""])[:3]
+    return method != _method_prefix or len(salt) != HASH_SALT_LENGTH
+
+
+def stats():
+    with _lock:
+        out = dict(_stats, buckets=dict(zip(LATENCY_BUCKETS, _stats["buckets"])))
+    out["concurrency"] = HASH_CONCURRENCY
+    out["queue_depth"] = HASH_QUEUE_DEPTH
+    out["method"] = HASH_METHOD
+    return out
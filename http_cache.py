@@ -0,0 +1,19 @@
+from flask import request, make_response
+
+
+# --------- Conditional GET ---------
+def not_modified(etag):
+    """Return a 304 response if the client already holds ``etag``, otherwise None.
+
+    Call this before loading rows so an unchanged resource costs only the
+    version lookup that produced the tag.
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return with_etag(make_response("", 304), etag)
+
+
+def with_etag(resp, etag):
+    resp.set_etag(etag, weak=True)
+    resp.cache_control.no_cache = True
+    return resp
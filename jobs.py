@@ -0,0 +1,184 @@
+import logging
+import os
+import signal
+import time
+from datetime import timedelta
+
+from sqlalchemy import select, update
+
+from models import db, Job, utcnow
+
+logger = logging.getLogger(__name__)
+
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 1.0))
+# A running job whose worker has not finished it within this many seconds is
+# assumed dead and handed to another worker. set_progress renews the lease,
+# so long handlers must report progress more often than this.
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", 900))
+# How often a worker looks for expired leases
+JOB_REQUEUE_INTERVAL = float(os.environ.get("JOB_REQUEUE_INTERVAL", 60))
+
+HANDLERS = {}
+
+
+def job_handler(kind):
+    """Register ``fn(job)`` as the handler for ``kind``; its return value is stored as the result."""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+# --------- Producers ---------
+def enqueue(kind, payload=None, max_attempts=3):
+    if kind not in HANDLERS:
+        raise ValueError(f"no handler registered for job kind {kind!r}")
+    job = Job(kind=kind, payload=payload or {}, max_attempts=max_attempts)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def set_progress(job, progress):
+    """Record progress from inside a handler and renew its lease.
+
+    Commits, so keep calls per-chunk, not per-row.
+    """
+    db.session.execute(
+        update(Job).where(Job.job_id == job.job_id).values(progress=progress, locked_at=utcnow()),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.commit()
+    job.progress = progress
+
+
+# --------- Workers ---------
+def _claim_postgres(now):
+    job = db.session.scalars(
+        select(Job)
+        .where(Job.status == "queued", Job.run_after <= now)
+        .order_by(Job.job_id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).first()
+    if job is None:
+        db.session.rollback()
+        return None
+    job.status = "running"
+    job.attempts += 1
+    job.locked_at = now
+    db.session.commit()
+    return job
+
+
+def _claim_fallback(now):
+    # SQLite has no SKIP LOCKED; a conditional UPDATE lets only one worker win each row
+    while True:
+        job_id = db.session.scalar(
+            select(Job.job_id)
+            .where(Job.status == "queued", Job.run_after <= now)
+            .order_by(Job.job_id)
+            .limit(1)
+        )
+        if job_id is None:
+            db.session.rollback()
+            return None
+        won = db.session.execute(
+            update(Job)
+            .where(Job.job_id == job_id, Job.status == "queued")
+            .values(status="running", attempts=Job.attempts + 1, locked_at=now),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        db.session.commit()
+        if won:
+            return db.session.get(Job, job_id)
+
+
+def claim_next():
+    now = utcnow()
+    if db.session.get_bind().dialect.name == "postgresql":
+        return _claim_postgres(now)
+    return _claim_fallback(now)
+
+
+def requeue_stale():
+    """Hand jobs with an expired lease to another worker.
+
+    A job that has used all its attempts is failed instead, so one that keeps
+    killing its worker is not retried forever. Returns the number requeued.
+    """
+    now = utcnow()
+    stale = (Job.status == "running", Job.locked_at < now - timedelta(seconds=JOB_LEASE_SECONDS))
+    failed = db.session.execute(
+        update(Job)
+        .where(*stale, Job.attempts >= Job.max_attempts)
+        .values(status="failed", locked_at=None, finished_at=now, error="lease expired: worker died or stalled"),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    count = db.session.execute(
+        update(Job)
+        .where(*stale)
+        .values(status="queued", locked_at=None),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    db.session.commit()
+    if failed or count:
+        logger.warning("expired job leases: %s requeued, %s failed permanently", count, failed)
+    return count
+
+
+def run_job(job):
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"no handler registered for job kind {job.kind!r}")
+        result = handler(job)
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job.job_id)
+        job.error = f"{type(e).__name__}: {e}"
+        job.locked_at = None
+        if job.attempts < job.max_attempts:
+            job.status = "queued"
+            job.run_after = utcnow() + timedelta(seconds=2 ** job.attempts)
+            logger.warning("job %s (%s) failed, retrying: %s", job.job_id, job.kind, job.error)
+        else:
+            job.status = "failed"
+            job.finished_at = utcnow()
+            logger.error("job %s (%s) failed permanently: %s", job.job_id, job.kind, job.error)
+        db.session.commit()
+        return job
+
+    job = db.session.get(Job, job.job_id)
+    job.status = "succeeded"
+    job.result = result
+    job.error = None
+    job.locked_at = None
+    job.finished_at = utcnow()
+    db.session.commit()
+    return job
+
+
+def work(once=False, poll_interval=JOB_POLL_INTERVAL):
+    """Process jobs until SIGTERM/SIGINT, or until the queue is empty when ``once``."""
+    stopping = []
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stopping.append(True))
+
+    processed = 0
+    next_requeue = 0.0
+    while not stopping:
+        if time.monotonic() >= next_requeue:
+            requeue_stale()
+            next_requeue = time.monotonic() + JOB_REQUEUE_INTERVAL
+        job = claim_next()
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        logger.info("running job %s (%s), attempt %s", job.job_id, job.kind, job.attempts)
+        run_job(job)
+        processed += 1
+        db.session.remove()
+    return processed
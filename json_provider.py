@@ -0,0 +1,47 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json is used instead
+    orjson = None
+
+if orjson is not None:
+    # Keep the stdlib provider's output: sorted keys, and dates / dataclasses
+    # go through DefaultJSONProvider.default (HTTP dates, not ISO 8601)
+    ORJSON_OPTIONS = (
+        orjson.OPT_SORT_KEYS
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider that encodes and decodes with orjson.
+
+    Calls with stdlib-only arguments (indent, separators, ...) and debug-mode
+    pretty printing fall back to the stdlib implementation.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Use orjson for request and response bodies when it is installed."""
+    if orjson is not None:
+        app.json = ORJSONProvider(app)
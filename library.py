@@ -0,0 +1,316 @@
+import csv
+import io
+import time
+
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+
+from models import db, Game, ChecklistItem
+from checklist import ORDER_GAP
+
+EXPORT_BATCH_SIZE = 1000
+
+GAME_FIELDS = (
+    "game_id",
+    "title",
+    "platform",
+    "genre",
+    "run_type",
+    "tags",
+    "cover_url",
+    "thumbnail_url",
+)
+ITEM_FIELDS = ("checklist_item_id", "description", "completed", "order")
+
+
+# --------- Library: Export ---------
+def iter_library_ndjson(user_id):
+    """Yield a user's games and checklist items as NDJSON lines.
+
+    One joined query ordered by game_id, read from a server-side cursor, so
+    memory stays flat however large the library is. Each game line
+    ({"type": "game", ...}) is followed by its items ({"type": "item", ...}).
+    """
+    dumps = current_app.json.dumps
+    q = (
+        db.session.query(
+            *(getattr(Game, f) for f in GAME_FIELDS),
+            *(getattr(ChecklistItem, f) for f in ITEM_FIELDS),
+        )
+        .outerjoin(ChecklistItem, ChecklistItem.game_id == Game.game_id)
+        .filter(Game.user_id == user_id)
+        .order_by(
+            Game.game_id,
+            ChecklistItem.order.asc().nulls_last(),
+            ChecklistItem.checklist_item_id,
+        )
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+
+    current = None
+    for row in q:
+        if row.game_id != current:
+            current = row.game_id
+            game = {f: getattr(row, f) for f in GAME_FIELDS}
+            yield dumps({"type": "game", **game}) + "\n"
+        if row.checklist_item_id is not None:
+            item = {f: getattr(row, f) for f in ITEM_FIELDS}
+            yield dumps({"type": "item", "game_id": row.game_id, **item}) + "\n"
+
+
+# --------- Library: Import ---------
+IMPORT_BATCH_GAMES = 500
+IMPORT_BATCH_ITEMS = 5000
+
+CSV_ITEM_COLUMNS = {
+    "item_description": "description",
+    "item_completed": "completed",
+    "item_order": "order",
+}
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def _truthy(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y", "x")
+    return bool(value)
+
+
+def _int_or_none(value):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ImportRowError(f"order must be an integer, got {value!r}")
+
+
+def _clean(value):
+    value = "" if value is None else str(value).strip()
+    return value or None
+
+
+def _game_record(data, items):
+    title = _clean(data.get("title"))
+    if not title:
+        raise ImportRowError("title is required")
+    return {
+        **{f: _clean(data.get(f)) for f in GAME_FIELDS if f not in ("game_id", "title")},
+        "title": title,
+        "items": items,
+    }
+
+
+def _item_record(data):
+    desc = _clean(data.get("description"))
+    if not desc:
+        raise ImportRowError("item description is required")
+    return {
+        "description": desc,
+        "completed": _truthy(data.get("completed")),
+        "order": _int_or_none(data.get("order")),
+    }
+
+
+def _add_item(pending, line_no, data):
+    # One bad item rejects its whole game, as it does for a nested NDJSON game;
+    # the first bad item's line is the one reported
+    try:
+        pending[2].append(_item_record(data))
+    except ImportRowError as e:
+        if pending[3] is None:
+            pending[3] = (line_no, e)
+
+
+def _finish_pending(pending):
+    line_no, data, items, error = pending
+    if error is not None:
+        yield error
+        return
+    try:
+        yield line_no, _game_record(data, items)
+    except ImportRowError as e:
+        yield line_no, e
+
+
+def parse_ndjson(lines):
+    """Yield (line_no, game_record or ImportRowError).
+
+    Accepts nested games ({"title", ..., "items": [...]}) as well as the flat
+    game/item lines written by the export, so an export can be re-imported.
+    """
+    pending = None  # [line_no, data, items, error] for a flat "game" line awaiting its items
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = current_app.json.loads(line)
+            if not isinstance(data, dict):
+                raise ImportRowError("each line must be a JSON object")
+
+            if data.get("type") == "item":
+                if pending is None:
+                    raise ImportRowError("item line before any game line")
+                _add_item(pending, line_no, data)
+                continue
+
+            if pending is not None:
+                yield from _finish_pending(pending)
+                pending = None
+
+            if data.get("type") == "game":
+                pending = [line_no, data, [], None]
+                continue
+
+            items = data.get("items") or []
+            if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+                raise ImportRowError("items must be a list of objects")
+            yield line_no, _game_record(data, [_item_record(i) for i in items])
+        except ImportRowError as e:
+            yield line_no, e
+        except ValueError as e:
+            yield line_no, ImportRowError(f"invalid JSON: {e}")
+
+    if pending is not None:
+        yield from _finish_pending(pending)
+
+
+def parse_csv(lines):
+    """Yield (line_no, game_record or ImportRowError) from CSV with one row per item.
+
+    Game columns: title, platform, genre, run_type, tags, cover_url, thumbnail_url
+    and optionally game_key to tell apart games with the same title. Item
+    columns: item_description, item_completed, item_order. Consecutive rows
+    for the same game are grouped; a row with no item_description is a game
+    without items. A game with an invalid item row is not imported; the
+    first bad row is reported.
+    """
+    reader = csv.DictReader(lines)
+    current_key = None
+    current = None  # [line_no, row, items, error]
+
+    for row in reader:
+        line_no = reader.line_num
+        key = (row.get("game_key") or "", row.get("title") or "", row.get("platform") or "")
+        if key != current_key and current is not None:
+            yield from _finish_pending(current)
+            current = None
+        if current is None:
+            current_key = key
+            current = [line_no, row, [], None]
+
+        if (row.get("item_description") or "").strip():
+            _add_item(current, line_no, {v: row.get(k) for k, v in CSV_ITEM_COLUMNS.items()})
+
+    if current is not None:
+        yield from _finish_pending(current)
+
+
+COPY_ITEMS_SQL = 'COPY checklist_item (game_id, description, completed, "order") FROM STDIN WITH (FORMAT csv)'
+
+
+def _copy_items(rows):
+    # Postgres COPY through the session's own connection, inside its transaction
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for r in rows:
+        writer.writerow((r["game_id"], r["description"], r["completed"], "" if r["order"] is None else r["order"]))
+    buf.seek(0)
+
+    conn = db.session.connection()
+    dbapi = conn.dialect.loaded_dbapi
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(COPY_ITEMS_SQL, buf)
+    except dbapi.Error as e:
+        # Raw driver errors bypass SQLAlchemy's wrapping; wrap them so callers
+        # handle a rejected COPY like any other failed statement
+        raise DBAPIError.instance(COPY_ITEMS_SQL, None, e, dbapi.Error) from e
+    finally:
+        cursor.close()
+
+
+def _insert_batch(user_id, games, use_copy):
+    game_ids = db.session.scalars(
+        insert(Game).returning(Game.game_id, sort_by_parameter_order=True),
+        [
+            {
+                **{k: v for k, v in g.items() if k != "items"},
+                "user_id": user_id,
+                "total_items": len(g["items"]),
+                "completed_items": sum(1 for i in g["items"] if i["completed"]),
+            }
+            for g in games
+        ],
+    ).all()
+
+    item_rows = []
+    for game_id, g in zip(game_ids, games):
+        # Items without an order go after every explicit one, like NULL orders
+        # sort in the export, so the two kinds never collide
+        order = max((i["order"] for i in g["items"] if i["order"] is not None), default=0)
+        for item in g["items"]:
+            if item["order"] is None:
+                order += ORDER_GAP
+                item = {**item, "order": order}
+            item_rows.append({**item, "game_id": game_id})
+
+    if item_rows:
+        if use_copy:
+            _copy_items(item_rows)
+        else:
+            db.session.execute(insert(ChecklistItem), item_rows)
+    return len(item_rows)
+
+
+def import_library(user_id, records):
+    """Insert parsed game records for ``user_id`` in large batches, one commit per batch.
+
+    ``records`` is the output of parse_ndjson / parse_csv. Invalid rows are
+    skipped and reported; a batch the database rejects is rolled back and
+    reported without stopping later batches.
+    """
+    use_copy = db.session.get_bind().dialect.driver == "psycopg2"
+    started = time.perf_counter()
+    result = {"games": 0, "items": 0, "batches": [], "errors": []}
+
+    batch, batch_items, first_line = [], 0, None
+
+    def flush():
+        info = {"batch": len(result["batches"]) + 1, "first_line": first_line, "games": len(batch)}
+        try:
+            items = _insert_batch(user_id, batch, use_copy)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            info.update(status="failed", error=str(getattr(e, "orig", None) or e).strip())
+        else:
+            result["games"] += len(batch)
+            result["items"] += items
+            info.update(status="ok", items=items)
+        result["batches"].append(info)
+
+    for line_no, record in records:
+        if isinstance(record, ImportRowError):
+            result["errors"].append({"line": line_no, "error": str(record)})
+            continue
+        if not batch:
+            first_line = line_no
+        batch.append(record)
+        batch_items += len(record["items"])
+        if len(batch) >= IMPORT_BATCH_GAMES or batch_items >= IMPORT_BATCH_ITEMS:
+            flush()
+            batch, batch_items = [], 0
+
+    if batch:
+        flush()
+
+    elapsed = time.perf_counter() - started
+    result["seconds"] = round(elapsed, 3)
+    result["rows_per_second"] = round((result["games"] + result["items"]) / elapsed, 1) if elapsed else None
+    return result
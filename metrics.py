@@ -0,0 +1,129 @@
+import os
+import time
+
+from flask import Response, g, has_app_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    REGISTRY,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from querybudget import query_budget
+
+# With PROMETHEUS_MULTIPROC_DIR set, every gunicorn worker writes its samples
+# to files in that directory and /metrics aggregates all of them, so a scrape
+# sees the whole server rather than whichever worker answered it.
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+LABELS = ("endpoint", "method", "status")
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent in the route handler.",
+    LABELS,
+)
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "Requests handled.",
+    LABELS,
+)
+SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements",
+    "SQL statements issued per request.",
+    ("endpoint",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250),
+)
+SQL_SECONDS = Histogram(
+    "http_request_sql_seconds",
+    "Total time spent executing SQL per request.",
+    ("endpoint",),
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Time to hash or verify one password.",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+POOL_SIZE = Gauge("db_pool_size", "Configured pool size.", ("engine",), multiprocess_mode="livesum")
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out.", ("engine",), multiprocess_mode="livesum"
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections open beyond pool_size.", ("engine",), multiprocess_mode="livesum"
+)
+REPLICA_FALLBACKS = Counter(
+    "db_replica_fallbacks_total",
+    "Read requests retried on the primary because the replica failed.",
+)
+
+
+# --------- SQL statement accounting ---------
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    if has_app_context() and "sql_count" in g:
+        g.sql_count += 1
+        g.sql_seconds += time.perf_counter() - started
+
+
+def _record_pools(engines):
+    for name, engine in engines.items():
+        pool = engine.pool
+        label = name or "default"
+        for gauge, attr in ((POOL_SIZE, "size"), (POOL_CHECKED_OUT, "checkedout"), (POOL_OVERFLOW, "overflow")):
+            fn = getattr(pool, attr, None)
+            if fn is not None:
+                # QueuePool.overflow() counts up from -pool_size
+                gauge.labels(label).set(max(fn(), 0))
+
+
+def render_metrics():
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    # content_type, not mimetype: Werkzeug would append a second charset
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+# --------- Flask wiring ---------
+def init_metrics(app, db):
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+        g.sql_count = 0
+        g.sql_seconds = 0.0
+
+    @app.after_request
+    def _observe(response):
+        if "request_started" not in g or request.endpoint == "metrics":
+            return response
+
+        endpoint = request.endpoint or "unmatched"
+        labels = (endpoint, request.method, str(response.status_code))
+        REQUEST_LATENCY.labels(*labels).observe(time.perf_counter() - g.request_started)
+        REQUEST_COUNT.labels(*labels).inc()
+        SQL_STATEMENTS.labels(endpoint).observe(g.sql_count)
+        SQL_SECONDS.labels(endpoint).observe(g.sql_seconds)
+        _record_pools(db.engines)
+        return response
+
+    @app.route("/metrics", methods=["GET"], endpoint="metrics")
+    @query_budget(0)
+    def metrics():
+        if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+            return Response("forbidden\n", status=403, mimetype="text/plain")
+        return render_metrics()
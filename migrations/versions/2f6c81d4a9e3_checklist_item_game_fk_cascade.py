@@ -0,0 +1,59 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "2f6c81d4a9e3"
+down_revision = "e61b2d7c9f40"
+branch_labels = None
+depends_on = None
+
+FK_NAME = "checklist_item_game_id_fkey"
+
+def _game_fk():
+    """(constraint name, delete rule) of checklist_item.game_id's foreign key, if any."""
+    bind = op.get_bind()
+    return bind.execute(
+        sa.text("""
+            SELECT tc.constraint_name, rc.delete_rule
+            FROM information_schema.table_constraints tc
+            JOIN information_schema.referential_constraints rc
+              ON rc.constraint_name = tc.constraint_name
+            JOIN information_schema.key_column_usage kcu
+              ON kcu.constraint_name = tc.constraint_name
+            WHERE tc.table_name = 'checklist_item'
+              AND tc.constraint_type = 'FOREIGN KEY'
+              AND kcu.column_name = 'game_id'
+            LIMIT 1
+        """),
+    ).first()
+
+def upgrade():
+    # Game deletes now rely on this cascade (passive_deletes); databases created
+    # before the model declared ondelete="CASCADE" may not have it
+    fk = _game_fk()
+    if fk is not None and fk.delete_rule == "CASCADE":
+        return
+
+    if fk is not None:
+        op.drop_constraint(fk.constraint_name, "checklist_item", type_="foreignkey")
+    else:
+        # Without any constraint, items of already-deleted games may linger
+        op.execute("""
+            DELETE FROM checklist_item ci
+            WHERE NOT EXISTS (SELECT 1 FROM game g WHERE g.game_id = ci.game_id)
+        """)
+
+    # Adding the constraint NOT VALID is quick but takes an exclusive lock
+    op.execute(f"""
+        ALTER TABLE checklist_item
+        ADD CONSTRAINT {FK_NAME} FOREIGN KEY (game_id)
+        REFERENCES game (game_id) ON DELETE CASCADE NOT VALID
+    """)
+    # autocommit_block commits the ADD first, releasing that lock; the full
+    # scan then runs under VALIDATE's weaker lock, so reads and writes continue
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE checklist_item VALIDATE CONSTRAINT {FK_NAME}")
+
+def downgrade():
+    # The cascade matches the model at every revision; nothing to undo
+    pass
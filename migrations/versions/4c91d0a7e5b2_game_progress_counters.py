@@ -0,0 +1,46 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "4c91d0a7e5b2"
+down_revision = "b7e2c41f9a03"
+branch_labels = None
+depends_on = None
+
+def _col_exists(table: str, col: str) -> bool:
+    bind = op.get_bind()
+    return bind.execute(
+        sa.text("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = :t AND column_name = :c
+            LIMIT 1
+        """),
+        {"t": table, "c": col},
+    ).scalar() is not None
+
+def upgrade():
+    for c in ("total_items", "completed_items"):
+        if not _col_exists("game", c):
+            with op.batch_alter_table("game") as batch_op:
+                batch_op.add_column(sa.Column(c, sa.Integer(), nullable=False, server_default="0"))
+
+    # Backfill both counters in one aggregated pass
+    op.execute("""
+        UPDATE game AS g
+        SET total_items = counts.total,
+            completed_items = counts.done
+        FROM (
+            SELECT game_id,
+                   COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE completed) AS done
+            FROM checklist_item
+            GROUP BY game_id
+        ) AS counts
+        WHERE counts.game_id = g.game_id
+    """)
+
+def downgrade():
+    for c in ("completed_items", "total_items"):
+        if _col_exists("game", c):
+            with op.batch_alter_table("game") as batch_op:
+                batch_op.drop_column(c)
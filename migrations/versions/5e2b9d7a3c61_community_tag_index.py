@@ -0,0 +1,29 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "5e2b9d7a3c61"
+down_revision = "7d2a9c4e1b58"
+branch_labels = None
+depends_on = None
+
+# Must stay identical to search.TAG_ARRAY so the planner can use the index
+TAG_ARRAY = r"regexp_split_to_array(lower(btrim(tags)), '\s*,\s*')"
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # CONCURRENTLY cannot run inside a transaction; build without blocking writes
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_community_checklist_tags "
+            f"ON community_checklist USING gin (({TAG_ARRAY}))"
+        )
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_community_checklist_tags")
@@ -0,0 +1,58 @@
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+log = logging.getLogger("alembic.runtime.migration")
+
+# revision identifiers, used by Alembic.
+revision = "7d2a9c4e1b58"
+down_revision = "2f6c81d4a9e3"
+branch_labels = None
+depends_on = None
+
+# checklist_item.game_id and community_checklist_item.community_checklist_id
+# already lead the (…, "order") unique indexes, so they need nothing new.
+INDEXES = (
+    ("ix_game_user_id_game_id", "game (user_id, game_id)"),
+    ("ix_user_email_lower", '"user" (lower(email))'),
+)
+
+def _duplicate_usernames() -> bool:
+    bind = op.get_bind()
+    return bind.execute(
+        sa.text("""
+            SELECT 1 FROM "user"
+            GROUP BY username
+            HAVING COUNT(*) > 1
+            LIMIT 1
+        """),
+    ).scalar() is not None
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    duplicates = _duplicate_usernames()
+
+    # CONCURRENTLY cannot run inside a transaction; build without blocking writes
+    with op.get_context().autocommit_block():
+        for name, target in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {target}")
+
+        if duplicates:
+            # Registration rejects taken usernames from now on, but existing
+            # duplicates have to be renamed before the unique index can exist
+            log.warning("duplicate usernames found; indexing username without UNIQUE. "
+                        "Rename them, then create ux_user_username by hand.")
+            op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_username ON "user" (username)')
+        else:
+            op.execute('CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_user_username ON "user" (username)')
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        for name in ("ux_user_username", "ix_user_username", *(n for n, _ in INDEXES)):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,57 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8b4e6f2d0a17"
+down_revision = "5e2b9d7a3c61"
+branch_labels = None
+depends_on = None
+
+# Must match checklist.ORDER_GAP / REBALANCE_MIN_GAP
+ORDER_GAP = 1024
+REBALANCE_MIN_GAP = 16
+
+def upgrade():
+    # Checklists written before gap-based ordering (or copied from templates
+    # numbered 1, 2, 3) have no room for a move. Respace every game with a
+    # NULL order or a gap under REBALANCE_MIN_GAP, keeping the item sequence.
+    op.execute(f"""
+        CREATE TEMPORARY TABLE respace AS
+        SELECT checklist_item_id, game_id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY game_id
+                   ORDER BY "order" IS NULL, "order", checklist_item_id
+               ) * {ORDER_GAP} AS new_order
+        FROM checklist_item
+        WHERE game_id IN (
+            SELECT game_id FROM (
+                SELECT game_id, "order",
+                       "order" - LAG("order") OVER (PARTITION BY game_id ORDER BY "order") AS gap
+                FROM checklist_item
+            ) gaps
+            WHERE "order" IS NULL OR gap < {REBALANCE_MIN_GAP}
+        )
+    """)
+    # Clear first so no intermediate state trips uq_checklist_order_per_game
+    op.execute("""
+        UPDATE checklist_item SET "order" = NULL
+        WHERE checklist_item_id IN (SELECT checklist_item_id FROM respace)
+    """)
+    op.execute("""
+        UPDATE checklist_item
+        SET "order" = (
+            SELECT new_order FROM respace
+            WHERE respace.checklist_item_id = checklist_item.checklist_item_id
+        )
+        WHERE checklist_item_id IN (SELECT checklist_item_id FROM respace)
+    """)
+    # Cached checklist ETags carry the old orders
+    op.execute("""
+        UPDATE game SET version = version + 1
+        WHERE game_id IN (SELECT DISTINCT game_id FROM respace)
+    """)
+    op.execute("DROP TABLE respace")
+
+def downgrade():
+    # The respaced orders keep the same sequence; nothing to undo
+    pass
@@ -0,0 +1,31 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "9a5f3e8d21c6"
+down_revision = "4c91d0a7e5b2"
+branch_labels = None
+depends_on = None
+
+def _col_exists(table: str, col: str) -> bool:
+    bind = op.get_bind()
+    return bind.execute(
+        sa.text("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = :t AND column_name = :c
+            LIMIT 1
+        """),
+        {"t": table, "c": col},
+    ).scalar() is not None
+
+def upgrade():
+    for table in ("game", "community_checklist"):
+        if not _col_exists(table, "version"):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+def downgrade():
+    for table in ("community_checklist", "game"):
+        if _col_exists(table, "version"):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column("version")
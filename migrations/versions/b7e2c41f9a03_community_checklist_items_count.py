@@ -0,0 +1,43 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "b7e2c41f9a03"
+down_revision = "745f8c5ac33d"
+branch_labels = None
+depends_on = None
+
+def _col_exists(table: str, col: str) -> bool:
+    bind = op.get_bind()
+    return bind.execute(
+        sa.text("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = :t AND column_name = :c
+            LIMIT 1
+        """),
+        {"t": table, "c": col},
+    ).scalar() is not None
+
+def upgrade():
+    if not _col_exists("community_checklist", "items_count"):
+        with op.batch_alter_table("community_checklist") as batch_op:
+            batch_op.add_column(
+                sa.Column("items_count", sa.Integer(), nullable=False, server_default="0")
+            )
+
+    # Backfill from the items table in one aggregated pass
+    op.execute("""
+        UPDATE community_checklist AS cc
+        SET items_count = counts.n
+        FROM (
+            SELECT community_checklist_id, COUNT(*) AS n
+            FROM community_checklist_item
+            GROUP BY community_checklist_id
+        ) AS counts
+        WHERE counts.community_checklist_id = cc.community_checklist_id
+    """)
+
+def downgrade():
+    if _col_exists("community_checklist", "items_count"):
+        with op.batch_alter_table("community_checklist") as batch_op:
+            batch_op.drop_column("items_count")
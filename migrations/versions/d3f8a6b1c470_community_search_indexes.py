@@ -0,0 +1,37 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "d3f8a6b1c470"
+down_revision = "9a5f3e8d21c6"
+branch_labels = None
+depends_on = None
+
+# Must stay identical to search.SEARCH_DOCUMENT so the planner can use the index
+SEARCH_DOCUMENT = (
+    "to_tsvector('simple', "
+    "coalesce(title, '') || ' ' || "
+    "coalesce(description, '') || ' ' || "
+    "coalesce(tags, ''))"
+)
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_community_checklist_fts "
+        f"ON community_checklist USING gin ({SEARCH_DOCUMENT})"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_community_checklist_title_trgm "
+        "ON community_checklist USING gin (lower(title) gin_trgm_ops)"
+    )
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_community_checklist_title_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_community_checklist_fts")
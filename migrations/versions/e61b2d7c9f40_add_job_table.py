@@ -0,0 +1,46 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "e61b2d7c9f40"
+down_revision = "d3f8a6b1c470"
+branch_labels = None
+depends_on = None
+
+def _table_exists(table: str) -> bool:
+    bind = op.get_bind()
+    return bind.execute(
+        sa.text("""
+            SELECT 1 FROM information_schema.tables
+            WHERE table_name = :t
+            LIMIT 1
+        """),
+        {"t": table},
+    ).scalar() is not None
+
+def upgrade():
+    if _table_exists("job"):
+        return
+
+    op.create_table(
+        "job",
+        sa.Column("job_id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("kind", sa.String(length=50), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("progress", sa.JSON(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("run_after", sa.DateTime(), nullable=False),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_job_status_run_after", "job", ["status", "run_after"])
+
+def downgrade():
+    if _table_exists("job"):
+        op.drop_index("ix_job_status_run_after", table_name="job")
+        op.drop_table("job")
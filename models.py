@@ -1,7 +1,23 @@
+import sqlite3
+from datetime import datetime, timezone
+
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func, UniqueConstraint
+from sqlalchemy import event, func, UniqueConstraint
+from sqlalchemy.engine import Engine
+
+from projection import Projection
+from replica import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
-db = SQLAlchemy()
+
+@event.listens_for(Engine, "connect")
+def _sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite only enforces foreign keys, and so ON DELETE CASCADE, when asked per connection
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
 
 
 # --------- User ---------
@@ -11,6 +27,12 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(200), nullable=False)
 
+    __table_args__ = (
+        db.Index("ux_user_username", "username", unique=True),
+        # Login and registration match emails case-insensitively
+        db.Index("ix_user_email_lower", func.lower(email)),
+    )
+
     def __repr__(self):
         return f"<User {self.email}>"
 
@@ -29,29 +51,92 @@ class Game(db.Model):
     cover_url = db.Column(db.Text, nullable=True)
     thumbnail_url = db.Column(db.Text, nullable=True)
 
+    # Maintained by the checklist write paths; see checklist.bump_game_counters
+    total_items = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    completed_items = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    # Bumped on every write to the game or its checklist; feeds the ETags
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
     created_at = db.Column(db.DateTime, server_default=func.now())
     updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
 
     user = db.relationship("User", backref="games")
 
+    __table_args__ = (
+        # Per-user listings page by game_id within one user
+        db.Index("ix_game_user_id_game_id", "user_id", "game_id"),
+    )
+
+    @property
+    def progress(self):
+        return progress_percent(self.completed_items, self.total_items)
+
     def to_dict(self):
-        return {
-            "game_id": self.game_id,
-            "user_id": self.user_id,
-            "title": self.title,
-            "platform": self.platform,
-            "genre": self.genre,
-            "tags": self.tags,
-            "run_type": self.run_type,
-            "progress": 0,
-            "cover_url": self.cover_url,
-            "thumbnail_url": self.thumbnail_url or self.cover_url,
-        }
+        return game_dict(self)
 
     def __repr__(self):
         return f'<Game {self.game_id} "{self.title}">'
 
 
+def progress_percent(completed, total):
+    total = total or 0
+    return 0 if total == 0 else round(((completed or 0) / total) * 100)
+
+
+def game_dict(g):
+    """Serialize a Game, or a row of GAME_FIELDS.columns()."""
+    return {
+        "game_id": g.game_id,
+        "user_id": g.user_id,
+        "title": g.title,
+        "platform": g.platform,
+        "genre": g.genre,
+        "tags": g.tags,
+        "run_type": g.run_type,
+        "progress": progress_percent(g.completed_items, g.total_items),
+        "total_items": g.total_items or 0,
+        "completed_items": g.completed_items or 0,
+        "cover_url": g.cover_url,
+        "thumbnail_url": g.thumbnail_url or g.cover_url,
+    }
+
+
+# Column-level projection for ?fields=. List endpoints select these columns
+# and pass the plain rows to game_dict, skipping ORM object construction.
+GAME_FIELDS = Projection(
+    {
+        "game_id": Game.game_id,
+        "user_id": Game.user_id,
+        "title": Game.title,
+        "platform": Game.platform,
+        "genre": Game.genre,
+        "tags": Game.tags,
+        "run_type": Game.run_type,
+        "progress": (
+            (Game.completed_items, Game.total_items),
+            lambda g: progress_percent(g.completed_items, g.total_items),
+        ),
+        "total_items": ((Game.total_items,), lambda g: g.total_items or 0),
+        "completed_items": ((Game.completed_items,), lambda g: g.completed_items or 0),
+        "cover_url": Game.cover_url,
+        "thumbnail_url": (
+            (Game.thumbnail_url, Game.cover_url),
+            lambda g: g.thumbnail_url or g.cover_url,
+        ),
+    },
+    full=game_dict,
+    always=(Game.game_id,),
+)
+
+
+@event.listens_for(Game, "before_update")
+def _bump_game_version(mapper, connection, target):
+    # Incremented in SQL, not from the loaded value, so concurrent updates
+    # never write the same version
+    target.version = Game.version + 1
+
+
 # --------- ChecklistItem ---------
 class ChecklistItem(db.Model):
     checklist_item_id = db.Column(db.Integer, primary_key=True)
@@ -66,7 +151,9 @@ class ChecklistItem(db.Model):
 
     game = db.relationship(
         "Game",
-        backref=db.backref("checklist_items", cascade="all, delete-orphan"),
+        # Deleting a game leaves its items to the FK's ON DELETE CASCADE
+        # instead of loading them first
+        backref=db.backref("checklist_items", cascade="all, delete-orphan", passive_deletes=True),
     )
 
     __table_args__ = (
@@ -96,6 +183,8 @@ class CommunityChecklist(db.Model):
     run_type = db.Column(db.String(100))
     tags = db.Column(db.String(255))
     thumbnail_url = db.Column(db.Text)
+    items_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     created_by_user_id = db.Column(db.Integer, db.ForeignKey("user.user_id"))
     created_by_user = db.relationship("User", backref="community_templates")
@@ -117,6 +206,7 @@ class CommunityChecklist(db.Model):
             "run_type": self.run_type,
             "tags": self.tags,
             "thumbnail_url": self.thumbnail_url,
+            "items_count": self.items_count,
             "created_by_user_id": self.created_by_user_id,
             "created_by_username": self.created_by_user.username
             if self.created_by_user
@@ -127,6 +217,12 @@ class CommunityChecklist(db.Model):
         return base
 
 
+@event.listens_for(CommunityChecklist, "before_update")
+def _bump_community_version(mapper, connection, target):
+    # In SQL for the same reason as _bump_game_version
+    target.version = CommunityChecklist.version + 1
+
+
 # --------- CommunityChecklistItem ---------
 class CommunityChecklistItem(db.Model):
     community_item_id = db.Column(db.Integer, primary_key=True)
@@ -149,3 +245,51 @@ class CommunityChecklistItem(db.Model):
             "description": self.description,
             "order": self.order,
         }
+
+
+
+# --------- Job ---------
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Job(db.Model):
+    job_id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+
+    # queued -> running -> succeeded | failed (or back to queued for a retry)
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+
+    progress = db.Column(db.JSON)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+
+    # Naive UTC, set from Python so SQLite and Postgres compare the same way
+    run_after = db.Column(db.DateTime, nullable=False, default=utcnow)
+    locked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_job_status_run_after", "status", "run_after"),
+    )
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() + "Z" if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() + "Z" if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f"<Job {self.job_id} {self.kind} {self.status}>"
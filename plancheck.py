@@ -0,0 +1,194 @@
+"""EXPLAIN-based plan checks for every route.
+
+Runs each request from ``querybudget.REQUESTS`` against seeded data in which
+the requesting user owns a small share of large tables, captures the SQL it
+issues and EXPLAINs every statement. A route fails when a plan reads one of
+LARGE_TABLES with a sequential scan, unless ALLOWED_SCANS says the route
+reads that table in full by design.
+
+    python plancheck.py [--database-url postgresql://.../scratch] [--users 200]
+
+Without --database-url it uses a throwaway SQLite file. The target database is
+dropped and recreated, so only ever point it at a scratch database. On
+Postgres the Alembic migrations are applied on top of create_all, so
+migration-only indexes (search, CONCURRENTLY-built ones) are checked too.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+
+LARGE_TABLES = {"user", "game", "checklist_item", "community_checklist", "community_checklist_item"}
+
+# Routes that read a whole table on purpose
+ALLOWED_SCANS = {
+    "list_community_checklists": {"community_checklist"},  # the full, unpaged listing
+    "search_community": {"community_checklist"},  # facet counts over every match
+}
+
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?! USING)")
+
+
+def _pg_seq_scans(plan):
+    found = set()
+    stack = [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if node.get("Node Type") == "Seq Scan":
+            found.add(node["Relation Name"])
+        stack.extend(node.get("Plans", ()))
+    return found
+
+
+def _seq_scans(cursor, dialect, statement, parameters):
+    if dialect == "postgresql":
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        return _pg_seq_scans(cursor.fetchone()[0])
+
+    cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    found = set()
+    for row in cursor.fetchall():
+        match = SQLITE_SCAN.match(row[-1])
+        if match:
+            found.add(match.group(1))
+    return found
+
+
+def _seed_filler(users, games, items, templates):
+    """Other users' data, so per-user and per-game filters are selective."""
+    from sqlalchemy import insert, select
+    from models import db, User, Game, ChecklistItem, CommunityChecklist, CommunityChecklistItem
+
+    user_ids = db.session.scalars(
+        insert(User).returning(User.user_id),
+        [{"username": f"filler{u}", "email": f"filler{u}@example.com", "password_hash": "x"} for u in range(users)],
+    ).all()
+    db.session.execute(
+        insert(Game),
+        [{"user_id": u, "title": f"Filler {g}", "total_items": items} for u in user_ids for g in range(games)],
+    )
+    game_ids = db.session.scalars(select(Game.game_id).where(Game.user_id.in_(user_ids))).all()
+    db.session.execute(
+        insert(ChecklistItem),
+        [{"game_id": g, "description": f"Item {i}", "order": (i + 1) * 1024} for g in game_ids for i in range(items)],
+    )
+
+    template_ids = db.session.scalars(
+        insert(CommunityChecklist).returning(CommunityChecklist.community_checklist_id),
+        [{"title": f"Filler template {t}", "platform": "Switch", "created_by_user_id": user_ids[0]} for t in range(templates)],
+    ).all()
+    db.session.execute(
+        insert(CommunityChecklistItem),
+        [{"community_checklist_id": t, "description": f"Step {i}", "order": i + 1} for t in template_ids for i in range(items)],
+    )
+    db.session.commit()
+
+
+def _capture(engine, client, method, path, body):
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(EXPLAINABLE):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        kwargs = {"data": body} if isinstance(body, str) else {"json": body}
+        resp = client.open(path, method=method, **kwargs)
+        resp.get_data()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements, resp.status_code
+
+
+def check(filler):
+    from flask_migrate import Migrate, upgrade
+    from sqlalchemy import text
+
+    from app import app
+    from cache import template_cache
+    from models import db
+    from querybudget import REQUESTS, _seed
+
+    failures = []
+    report = {}
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        engine = db.engine
+        dialect = engine.dialect.name
+        if dialect == "postgresql":
+            # Migrations are guarded, so they only add what create_all lacks.
+            # app.py registers Flask-Migrate only under the flask CLI.
+            Migrate(app, db)
+            upgrade()
+        ctx = _seed(filler["items"])
+        _seed_filler(**filler)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        template_cache.clear()
+        client = app.test_client()
+
+        for endpoint, make in REQUESTS.items():
+            statements, status = _capture(engine, client, *make(ctx, filler["items"]))
+            scans = set()
+            raw = engine.raw_connection()
+            try:
+                cursor = raw.cursor()
+                for statement, parameters in statements:
+                    scans |= _seq_scans(cursor, dialect, statement, parameters)
+                cursor.close()
+            finally:
+                raw.close()
+
+            bad = sorted((scans & LARGE_TABLES) - ALLOWED_SCANS.get(endpoint, set()))
+            report[endpoint] = {"statements": len(statements), "seq_scans": sorted(scans), "status": status}
+            if status >= 400:
+                failures.append(f"{endpoint}: request failed with {status}")
+            elif bad:
+                failures.append(f"{endpoint}: sequential scan on {', '.join(bad)}")
+        db.session.remove()
+    return report, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that route queries use indexes on large tables.")
+    parser.add_argument("--database-url", help="Scratch database to use; it is dropped and recreated.")
+    parser.add_argument("--users", type=int, default=200, help="Filler users.")
+    parser.add_argument("--games", type=int, default=20, help="Games per filler user.")
+    parser.add_argument("--items", type=int, default=10, help="Items per game and per template.")
+    parser.add_argument("--templates", type=int, default=2000, help="Filler community templates.")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print the scans of every route.")
+    args = parser.parse_args()
+    filler = {"users": args.users, "games": args.games, "items": args.items, "templates": args.templates}
+
+    path = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    try:
+        report, failures = check(filler)
+    finally:
+        if path:
+            os.remove(path)
+
+    if args.verbose:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{len(report) - len(failures)}/{len(report)} routes without unexpected sequential scans")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from operator import attrgetter
+
+from flask import request
+
+
+class FieldsError(ValueError):
+    pass
+
+
+class Projection:
+    """The output fields of one resource and the columns each of them reads.
+
+    ``fields`` maps an output name to a column, or to ``(columns, get)`` where
+    ``get(row)`` computes the value from those columns. ``full`` serializes a
+    row carrying every column and is used when the client asks for no subset.
+    ``always`` columns are selected regardless (e.g. the keyset cursor column);
+    ``extra`` names are accepted in ?fields= but loaded by the caller.
+    """
+
+    def __init__(self, fields, full, always=(), extra=()):
+        self.fields = {}
+        for name, spec in fields.items():
+            columns, get = spec if isinstance(spec, tuple) else ((spec,), None)
+            self.fields[name] = (columns, get or attrgetter(columns[0].key))
+        self.full = full
+        self.always = always
+        self.extra = extra
+
+    def requested(self, args=None):
+        """Names from ?fields=a,b,c in request order, or None when absent.
+
+        ``args`` defaults to the Flask request's query string.
+        """
+        raw = (request.args if args is None else args).get("fields")
+        if raw is None:
+            return None
+        names = tuple(dict.fromkeys(n.strip() for n in raw.split(",") if n.strip()))
+        unknown = [n for n in names if n not in self.fields and n not in self.extra]
+        if unknown or not names:
+            allowed = ", ".join([*self.fields, *self.extra])
+            raise FieldsError(f"unknown fields: {', '.join(unknown) or '(none given)'}; allowed: {allowed}")
+        return names
+
+    def columns(self, names=None):
+        """Columns to select for ``names`` (all fields when None), deduplicated."""
+        picked = {}
+        for col in self.always:
+            picked.setdefault(col.key, col)
+        for name in self.fields if names is None else names:
+            for col in self.fields.get(name, ((), None))[0]:
+                picked.setdefault(col.key, col)
+        return list(picked.values())
+
+    def serializer(self, names=None):
+        if names is None:
+            return self.full
+        getters = [(name, self.fields[name][1]) for name in names if name in self.fields]
+        return lambda row: {name: get(row) for name, get in getters}
+
+    @staticmethod
+    def etag_suffix(names):
+        return "" if names is None else "-" + "+".join(names)
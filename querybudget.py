@@ -0,0 +1,251 @@
+"""Per-route SQL statement budgets.
+
+Routes declare their budget next to the route with ``@query_budget(n)``.
+At runtime a request that goes over budget is logged. Run this module to
+check every route against seeded data of several sizes:
+
+    python querybudget.py [--sizes 2,8,32]
+
+A route fails when it has no budget, when its statement count grows with
+the seeded row count (an N+1), or when it goes over its budget. The
+check runs against a throwaway SQLite database, never DATABASE_URL, and
+exits non-zero on any failure so it can gate a deploy.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from flask import g, request
+
+
+def query_budget(n, sqlite_per_row=0):
+    """Declare the most SQL statements one request to this route may issue.
+
+    ``sqlite_per_row`` allows that many more statements per input row on
+    SQLite, for bulk inserts that need RETURNING in parameter order, which
+    SQLite runs one row at a time. The harness takes the allowance off
+    before its growth check; other databases get no allowance.
+    """
+    def mark(fn):
+        fn.query_budget = n
+        fn.query_budget_sqlite_per_row = sqlite_per_row
+        return fn
+    return mark
+
+
+def _allowance(view, dialect, rows):
+    return getattr(view, "query_budget_sqlite_per_row", 0) * rows if dialect == "sqlite" else 0
+
+
+def init_query_budgets(app):
+    @app.after_request
+    def _check_budget(response):
+        view = app.view_functions.get(request.endpoint)
+        budget = getattr(view, "query_budget", None)
+        # The per-row count is unknown here; SQLite is only used in development
+        dialect = app.extensions["sqlalchemy"].engine.dialect.name
+        if getattr(view, "query_budget_sqlite_per_row", 0) and dialect == "sqlite":
+            return response
+        if budget is not None and g.get("sql_count", 0) > budget:
+            app.logger.warning(
+                "%s issued %d SQL statements (budget %d)", request.endpoint, g.sql_count, budget
+            )
+        return response
+
+
+# --------- Harness ---------
+# endpoint -> fn(ctx, n) returning (method, path, body). Writes run after reads
+# and each targets its own rows, so one seeded database serves every route.
+# Bulk routes get n input rows, matching their sqlite_per_row allowance.
+def _ndjson(n):
+    lines = [{"title": f"Imported {i}", "items": [{"description": f"i{j}"} for j in range(n)]} for i in range(n)]
+    return "\n".join(json.dumps(x) for x in lines)
+
+
+REQUESTS = {
+    # reads
+    "login": lambda c, n: ("POST", "/api/login", {"email": c["email"], "password": "pw"}),
+    "fetch_checklist": lambda c, n: ("GET", f"/api/games/{c['games'][0]}/checklist", None),
+    "get_game": lambda c, n: ("GET", f"/api/games/{c['games'][0]}", None),
+    "list_games": lambda c, n: ("GET", f"/api/games?user_id={c['user_id']}", None),
+    "game_progress": lambda c, n: ("GET", f"/api/games/{c['games'][0]}/progress", None),
+    "export_library": lambda c, n: ("GET", f"/api/users/{c['user_id']}/export", None),
+    "list_community_checklists": lambda c, n: ("GET", "/api/community", None),
+    "search_community": lambda c, n: ("GET", "/api/community/search?q=template&platform=PC", None),
+    "get_community_checklist": lambda c, n: ("GET", f"/api/community/{c['templates'][0]}", None),
+    "get_game_thumbnail": lambda c, n: ("GET", f"/api/games/{c['games'][0]}/thumbnail", None),
+    "list_game_thumbnails": lambda c, n: ("GET", f"/api/games/thumbnails?user_id={c['user_id']}", None),
+    "list_games_with_thumbnails": lambda c, n: ("GET", f"/api/games/with-thumbnails?user_id={c['user_id']}", None),
+    "get_job": lambda c, n: ("GET", f"/api/jobs/{c['job_id']}", None),
+    "cache_stats": lambda c, n: ("GET", "/api/admin/cache/stats", None),
+    "hashing_stats": lambda c, n: ("GET", "/api/admin/hashing/stats", None),
+    "db_pool_stats": lambda c, n: ("GET", "/api/admin/db/pool", None),
+    "metrics": lambda c, n: ("GET", "/metrics", None),
+    # writes
+    "register": lambda c, n: ("POST", "/api/register", {"username": "new", "email": "new@example.com", "password": "pw"}),
+    "create_checklist_item": lambda c, n: ("POST", f"/api/games/{c['games'][1]}/checklist", {"description": "new"}),
+    "batch_update_checklist": lambda c, n: ("PATCH", f"/api/games/{c['games'][1]}/checklist", {
+        "update": [{"id": i, "completed": True} for i in c["items"][c["games"][1]][1:]],
+        "create": [{"description": f"batch {i}"} for i in range(n)],
+        "delete": c["items"][c["games"][1]][:1],
+    }),
+    "reorder_items": lambda c, n: ("POST", f"/api/games/{c['games'][2]}/checklist/reorder", {
+        # n moves: each item to the top in turn, reversing the list
+        "moves": [{"id": i, "after": None} for i in c["items"][c["games"][2]]],
+    }),
+    "update_item": lambda c, n: ("PUT", f"/api/checklist/{c['items'][c['games'][2]][0]}", {"completed": True}),
+    "delete_item": lambda c, n: ("DELETE", f"/api/checklist/{c['items'][c['games'][3]][0]}", None),
+    "add_game": lambda c, n: ("POST", "/api/games", {"user_id": c["user_id"], "title": "Added"}),
+    "update_game": lambda c, n: ("PATCH", f"/api/games/{c['games'][3]}", {"title": "Renamed", "platform": "PC"}),
+    "update_game_thumbnail": lambda c, n: ("PATCH", f"/api/games/{c['games'][3]}/thumbnail", {"thumbnail_url": "https://example.com/t.png"}),
+    "import_library_route": lambda c, n: ("POST", f"/api/users/{c['user_id']}/import", _ndjson(n)),
+    "import_community_checklist": lambda c, n: ("POST", f"/api/community/import/{c['templates'][0]}", {"user_id": c["user_id"]}),
+    "create_community_checklist": lambda c, n: ("POST", "/api/community", {
+        "title": "New template", "created_by_user_id": c["user_id"], "items": [f"step {i}" for i in range(n)],
+    }),
+    "backfill_thumbnails_route": lambda c, n: ("POST", "/api/admin/thumbnails/backfill", {"default_url": "https://example.com/d.png"}),
+    "bulk_delete_games": lambda c, n: ("POST", "/api/games/bulk-delete", {"user_id": c["user_id"], "game_ids": c["games"][-3:-1]}),
+    "delete_game": lambda c, n: ("DELETE", f"/api/games/{c['games'][-1]}", None),
+}
+
+
+def _seed(n):
+    from sqlalchemy import insert
+    from hashing import hash_password
+    from models import db, User, Game, ChecklistItem, CommunityChecklist, CommunityChecklistItem, Job
+
+    user = User(username="budget", email="budget@example.com", password_hash=hash_password("pw"))
+    db.session.add(user)
+    db.session.flush()
+
+    # Enough games for every write target, each with n items
+    games = db.session.scalars(
+        insert(Game).returning(Game.game_id, sort_by_parameter_order=True),
+        [{"user_id": user.user_id, "title": f"Game {i}", "total_items": n} for i in range(max(n, 5))],
+    ).all()
+    items = {}
+    for game_id in games:
+        items[game_id] = db.session.scalars(
+            insert(ChecklistItem).returning(ChecklistItem.checklist_item_id, sort_by_parameter_order=True),
+            [{"game_id": game_id, "description": f"Item {j}", "order": (j + 1) * 1024} for j in range(n)],
+        ).all()
+
+    templates = db.session.scalars(
+        insert(CommunityChecklist).returning(CommunityChecklist.community_checklist_id, sort_by_parameter_order=True),
+        [
+            {"title": f"Community template {i}", "platform": "PC", "created_by_user_id": user.user_id, "items_count": n}
+            for i in range(n)
+        ],
+    ).all()
+    db.session.execute(
+        insert(CommunityChecklistItem),
+        [{"community_checklist_id": t, "description": f"Step {j}", "order": j + 1} for t in templates for j in range(n)],
+    )
+
+    job = Job(kind="thumbnail_backfill", payload={})
+    db.session.add(job)
+    db.session.commit()
+
+    return {
+        "user_id": user.user_id,
+        "email": user.email,
+        "games": games,
+        "items": items,
+        "templates": templates,
+        "job_id": job.job_id,
+    }
+
+
+def _count_route(app, engine, client, method, path, body):
+    from sqlalchemy import event
+
+    counter = [0]
+
+    def count(*_):
+        counter[0] += 1
+
+    event.listen(engine, "after_cursor_execute", count)
+    try:
+        kwargs = {"data": body} if isinstance(body, str) else {"json": body}
+        resp = client.open(path, method=method, **kwargs)
+        resp.get_data()  # drain streamed bodies while still counting
+    finally:
+        event.remove(engine, "after_cursor_execute", count)
+    return counter[0], resp.status_code
+
+
+def check(sizes):
+    from app import app
+    from cache import template_cache
+    from models import db
+
+    rules = {r.endpoint for r in app.url_map.iter_rules() if r.endpoint != "static"}
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    counts = {endpoint: {} for endpoint in rules}
+    statuses = {endpoint: {} for endpoint in rules}
+
+    for n in sizes:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            ctx = _seed(n)
+            template_cache.clear()
+            engine = db.engine
+            client = app.test_client()
+            for endpoint, make in REQUESTS.items():
+                if endpoint in rules:
+                    count, status = _count_route(app, engine, client, *make(ctx, n))
+                    counts[endpoint][n] = count
+                    statuses[endpoint][n] = status
+            db.session.remove()
+
+    failures = []
+    report = {}
+    for endpoint in sorted(rules):
+        view = app.view_functions[endpoint]
+        budget = getattr(view, "query_budget", None)
+        # Statements left once the declared per-row allowance is taken off
+        seen = {n: c - _allowance(view, dialect, n) for n, c in counts[endpoint].items()}
+        report[endpoint] = {"budget": budget, "statements": counts[endpoint], "status": statuses[endpoint]}
+        if endpoint not in REQUESTS:
+            failures.append(f"{endpoint}: no request in querybudget.REQUESTS")
+        elif budget is None:
+            failures.append(f"{endpoint}: no @query_budget declared")
+        elif any(s >= 400 for s in statuses[endpoint].values()):
+            failures.append(f"{endpoint}: request failed with {statuses[endpoint]}")
+        elif len(sizes) > 1 and seen[sizes[-1]] > seen[sizes[-2]]:
+            failures.append(f"{endpoint}: statements grow with data size {seen}")
+        elif max(seen.values()) > budget:
+            failures.append(f"{endpoint}: {max(seen.values())} statements over budget {budget}")
+    return report, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check per-route SQL statement budgets.")
+    parser.add_argument("--sizes", default="2,8,32", help="Comma-separated seed sizes.")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print counts for every route.")
+    args = parser.parse_args()
+    sizes = sorted({int(s) for s in args.sizes.split(",")})
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    try:
+        report, failures = check(sizes)
+    finally:
+        os.remove(path)
+
+    if args.verbose:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{len(report) - len(failures)}/{len(report)} routes within budget")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
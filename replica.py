@@ -0,0 +1,147 @@
+import logging
+import os
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql.dml import UpdateBase
+
+from metrics import REPLICA_FALLBACKS
+
+log = logging.getLogger(__name__)
+
+REPLICA_BIND = "replica"
+
+# After a client writes, its reads stay on the primary for this long so it
+# sees its own changes despite replication lag. Writes answer with the
+# deadline in STICKY_HEADER; clients send it back on their reads. The SPA
+# calls the API cross-origin without credentials, so the cookie only helps
+# same-origin callers.
+STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", "10"))
+STICKY_HEADER = "X-Primary-Until"
+STICKY_COOKIE = "primary_until"
+# How long to leave the replica alone after it failed a health check
+RETRY_SECONDS = int(os.environ.get("REPLICA_RETRY_SECONDS", "30"))
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_down_until = 0.0
+
+
+def replica_url():
+    return os.environ.get("DATABASE_REPLICA_URL")
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica engine while ``g.use_replica`` is set.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+            and has_app_context()
+            and g.get("use_replica")
+        ):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _replica_engine():
+    return current_app.extensions["sqlalchemy"].engines.get(REPLICA_BIND)
+
+
+def sticky(req):
+    """True while the client's post-write stickiness window is open.
+
+    ``req`` is a Flask or Starlette request; the deadline comes from
+    STICKY_HEADER or, failing that, STICKY_COOKIE. The client controls
+    both, so a deadline further out than STICKY_SECONDS was not issued here
+    and is ignored rather than pinning the client to the primary.
+    """
+    until = req.headers.get(STICKY_HEADER) or req.cookies.get(STICKY_COOKIE) or 0
+    try:
+        until = float(until)
+    except ValueError:
+        return False
+    now = time.time()
+    return now < until <= now + STICKY_SECONDS
+
+
+def replica_down():
+    return time.monotonic() < _down_until
+
+
+def _replica_reachable(engine):
+    try:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+    except OperationalError:
+        return False
+    return True
+
+
+def mark_replica_down(exc):
+    global _down_until
+    _down_until = time.monotonic() + RETRY_SECONDS
+    log.warning("read replica unavailable, using primary for %ss: %s", RETRY_SECONDS, exc)
+
+
+def use_replica(view):
+    """Serve this read-only view from the replica when one is configured.
+
+    Requests from clients that wrote recently (see STICKY_SECONDS) stay on the
+    primary. If the replica fails, the view is retried on the primary and
+    the replica is skipped for RETRY_SECONDS.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        engine = _replica_engine()
+        if engine is None or sticky(request) or replica_down():
+            return view(*args, **kwargs)
+
+        # Left set for the rest of the request so streamed bodies read the replica too
+        g.use_replica = True
+        try:
+            return view(*args, **kwargs)
+        except OperationalError as e:
+            g.use_replica = False
+            current_app.extensions["sqlalchemy"].session.rollback()
+            # A statement timeout is the query's fault, not the replica's
+            if _replica_reachable(engine):
+                raise
+            mark_replica_down(e)
+            REPLICA_FALLBACKS.inc()
+            return view(*args, **kwargs)
+
+    return wrapper
+
+
+def init_replica(app):
+    """Start the stickiness window after every successful write."""
+
+    @app.after_request
+    def _stick_to_primary(response):
+        if (
+            REPLICA_BIND in app.config.get("SQLALCHEMY_BINDS", {})
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            until = str(int(time.time()) + STICKY_SECONDS)
+            response.headers[STICKY_HEADER] = until
+            response.set_cookie(
+                STICKY_COOKIE,
+                until,
+                max_age=STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,183 @@
+from flask import request, jsonify
+from sqlalchemy import and_, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import array
+
+from models import db, User, CommunityChecklist
+from projection import Projection
+
+
+# --------- Community: Listing rows ---------
+LISTING_COLUMNS = (
+    CommunityChecklist.community_checklist_id,
+    CommunityChecklist.title,
+    CommunityChecklist.description,
+    CommunityChecklist.platform,
+    CommunityChecklist.genre,
+    CommunityChecklist.run_type,
+    CommunityChecklist.tags,
+    CommunityChecklist.thumbnail_url,
+    CommunityChecklist.items_count,
+    User.username,
+)
+
+
+def _with_creator(q, columns):
+    if any(c is User.username for c in columns):
+        q = q.outerjoin(User, User.user_id == CommunityChecklist.created_by_user_id)
+    return q
+
+
+def community_listing_query(columns=LISTING_COLUMNS):
+    """Columns for a template listing row, with the creator's username joined in if selected."""
+    return _with_creator(db.session.query(*columns), columns)
+
+
+def community_listing_select(columns=LISTING_COLUMNS):
+    """community_listing_query as a Core select, for the async read path."""
+    return _with_creator(select(*columns), columns)
+
+
+def community_listing_row(t, default_thumb):
+    return {
+        "community_checklist_id": t.community_checklist_id,
+        "title": t.title,
+        "description": t.description,
+        "platform": t.platform,
+        "genre": t.genre,
+        "run_type": t.run_type,
+        "tags": t.tags,
+        "thumbnail_url": t.thumbnail_url or default_thumb,
+        "items_count": t.items_count,
+        "created_by_username": t.username,
+    }
+
+
+def community_listing_fields(default_thumb):
+    """?fields= projection over LISTING_COLUMNS."""
+    return Projection(
+        {
+            "community_checklist_id": CommunityChecklist.community_checklist_id,
+            "title": CommunityChecklist.title,
+            "description": CommunityChecklist.description,
+            "platform": CommunityChecklist.platform,
+            "genre": CommunityChecklist.genre,
+            "run_type": CommunityChecklist.run_type,
+            "tags": CommunityChecklist.tags,
+            "thumbnail_url": (
+                (CommunityChecklist.thumbnail_url,),
+                lambda t: t.thumbnail_url or default_thumb,
+            ),
+            "items_count": CommunityChecklist.items_count,
+            "created_by_username": User.username,
+        },
+        full=lambda t: community_listing_row(t, default_thumb),
+        always=(CommunityChecklist.community_checklist_id,),
+    )
+
+
+# --------- Community: Search ---------
+FACETS = ("platform", "genre", "run_type")
+MAX_SEARCH_LIMIT = 200
+
+# Must stay identical to the expression indexed by ix_community_checklist_fts
+SEARCH_DOCUMENT = literal_column(
+    "to_tsvector('simple', "
+    "coalesce(community_checklist.title, '') || ' ' || "
+    "coalesce(community_checklist.description, '') || ' ' || "
+    "coalesce(community_checklist.tags, ''))"
+)
+
+
+# Tags are stored comma-separated. Must stay identical to the expression
+# indexed by ix_community_checklist_tags (GIN over the lower-cased tag array).
+TAG_ARRAY = literal_column(
+    r"regexp_split_to_array(lower(btrim(community_checklist.tags)), '\s*,\s*')"
+)
+
+
+def _tag_filter(tag):
+    """Whole-tag, case-insensitive membership: ``rpg`` matches "RPG, open world", not "ARPG"."""
+    tag = tag.lower()
+    if db.session.get_bind().dialect.name == "postgresql":
+        return TAG_ARRAY.op("@>")(array([tag]))
+
+    # SQLite fallback for local runs: compare against ",tag1,tag2," on comma boundaries
+    padded = "," + func.replace(func.replace(func.lower(CommunityChecklist.tags), ", ", ","), " ,", ",") + ","
+    return padded.contains("," + tag + ",", autoescape=True)
+
+
+def _text_filter(text):
+    if db.session.get_bind().dialect.name == "postgresql":
+        # GIN full-text index for words, trigram index on lower(title) for fragments
+        return or_(
+            SEARCH_DOCUMENT.op("@@")(func.plainto_tsquery(literal_column("'simple'"), text)),
+            CommunityChecklist.title.icontains(text, autoescape=True),
+        )
+
+    # SQLite fallback for local runs: every term must appear somewhere
+    return and_(*(
+        or_(
+            CommunityChecklist.title.icontains(term, autoescape=True),
+            CommunityChecklist.description.icontains(term, autoescape=True),
+            CommunityChecklist.tags.icontains(term, autoescape=True),
+        )
+        for term in text.split()
+    ))
+
+
+def search_community_checklists(default_thumb):
+    """GET /api/community/search?q=&platform=&genre=&run_type=&tag=&limit=&cursor=&fields="""
+    listing = community_listing_fields(default_thumb)
+    fields = listing.requested()
+    text = (request.args.get("q") or "").strip()
+    tags = [t.strip() for t in request.args.getlist("tag") if t.strip()]
+    facet_values = {f: (request.args.get(f) or "").strip() for f in FACETS}
+    limit = max(1, min(request.args.get("limit", 50, type=int), MAX_SEARCH_LIMIT))
+    cursor = request.args.get("cursor", type=int)
+
+    base = []
+    if text:
+        base.append(_text_filter(text))
+    for tag in tags:
+        base.append(_tag_filter(tag))
+
+    facet_filters = {
+        f: func.lower(getattr(CommunityChecklist, f)) == v.lower()
+        for f, v in facet_values.items()
+        if v
+    }
+    filters = base + list(facet_filters.values())
+
+    q = community_listing_query(listing.columns(fields)).filter(*filters)
+    if cursor is not None:
+        q = q.filter(CommunityChecklist.community_checklist_id < cursor)
+    rows = q.order_by(CommunityChecklist.community_checklist_id.desc()).limit(limit + 1).all()
+
+    total = (
+        db.session.query(func.count(CommunityChecklist.community_checklist_id))
+        .filter(*filters)
+        .scalar()
+    )
+
+    # Each facet is counted with every filter except its own, so clients can
+    # show the alternatives next to the current selection
+    facets = {}
+    for f in FACETS:
+        col = getattr(CommunityChecklist, f)
+        others = base + [c for name, c in facet_filters.items() if name != f]
+        counts = (
+            db.session.query(col, func.count(CommunityChecklist.community_checklist_id))
+            .filter(*others, col.isnot(None))
+            .group_by(col)
+            .order_by(func.count(CommunityChecklist.community_checklist_id).desc(), col)
+            .all()
+        )
+        facets[f] = [{"value": v, "count": n} for v, n in counts]
+
+    serialize = listing.serializer(fields)
+    return jsonify({
+        "results": [serialize(t) for t in rows[:limit]],
+        "total": total,
+        "facets": facets,
+        "next_cursor": rows[limit - 1].community_checklist_id if len(rows) > limit else None,
+    }), 200
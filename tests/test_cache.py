@@ -0,0 +1,85 @@
+"""The community template cache with a shared backend.
+
+LocalBackend stands in for Redis: it has the same get/set/delete/clear
+surface, so these exercise the shared path without a Redis server.
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache
+from cache import LocalBackend, LRUCache
+from models import db, CommunityChecklist, CommunityChecklistItem
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    backend = LocalBackend()
+    monkeypatch.setattr(cache, "template_cache", LRUCache(backend=backend, namespace="community:"))
+    return backend
+
+
+def test_shared_cache_round_trips_through_backend(shared):
+    writer = cache.template_cache
+    reader = LRUCache(backend=shared, namespace="community:")  # another worker
+
+    writer.set(1, ["etag", "body"])
+
+    assert reader.get(1) == ["etag", "body"]
+    assert writer.stats()["backend"] == "LocalBackend"
+
+
+def test_invalidate_reaches_other_workers(shared):
+    reader = LRUCache(backend=shared, namespace="community:")
+    cache.template_cache.set(1, ["etag", "body"])
+
+    cache.template_cache.invalidate(1)
+
+    assert reader.get(1) is None
+
+
+def test_clear_drops_shared_entries_in_namespace_only(shared):
+    other = LRUCache(backend=shared, namespace="other:")
+    cache.template_cache.set(1, ["etag", "body"])
+    other.set(1, "kept")
+
+    cache.template_cache.clear()
+
+    assert cache.template_cache.get(1) is None
+    assert other.get(1) == "kept"
+
+
+def test_commit_invalidates_touched_template(shared):
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        template = CommunityChecklist(title="Template")
+        session.add(template)
+        session.commit()
+        template_id = template.community_checklist_id
+        cache.template_cache.set(template_id, ["etag", "body"])
+
+        session.add(CommunityChecklistItem(community_checklist_id=template_id, description="step", order=1))
+        session.flush()
+        assert cache.template_cache.get(template_id) is not None  # not before commit
+        session.commit()
+
+    assert cache.template_cache.get(template_id) is None
+
+
+def test_unreachable_redis_is_a_miss_and_backs_off():
+    pytest.importorskip("redis")
+    backend = cache.RedisBackend("redis://127.0.0.1:1/0")
+    shared_cache = LRUCache(backend=backend, namespace="community:")
+
+    shared_cache.set(1, ["etag", "body"])
+    assert shared_cache.get(1) is None
+    shared_cache.clear()
+
+    assert backend.errors == 1  # later calls skipped until the retry window passes
+    assert shared_cache.stats()["backend_errors"] == 1
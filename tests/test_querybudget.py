@@ -0,0 +1,18 @@
+"""Every route within its SQL statement budget, as ``python querybudget.py`` checks.
+
+Runs the harness in its own interpreter: it points DATABASE_URL at a
+throwaway file before importing the app, and the app is configured once
+per process.
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_every_route_within_budget():
+    result = subprocess.run(
+        [sys.executable, "querybudget.py"], cwd=ROOT, capture_output=True, text=True, timeout=600,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,75 @@
+"""Read-your-writes against a replica that never catches up.
+
+Primary and replica are two separate SQLite files, so anything written is
+missing on the replica for good. The client keeps no cookies, like the SPA
+calling the API cross-origin.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def client():
+    paths = []
+    for name in ("DATABASE_URL", "DATABASE_REPLICA_URL"):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        paths.append(path)
+        os.environ[name] = f"sqlite:///{path}"
+    sys.path.insert(0, ROOT)
+
+    from app import app
+    from models import db, User
+    from replica import REPLICA_BIND
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        user = User(username="reader", email="reader@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.user_id
+
+    yield app.test_client(use_cookies=False), user_id
+
+    for path in paths:
+        os.remove(path)
+
+
+def test_read_after_write_echoing_header_hits_primary(client):
+    client, user_id = client
+    created = client.post("/api/games", json={"user_id": user_id, "title": "Fresh"})
+    assert created.status_code == 201
+    until = created.headers["X-Primary-Until"]
+    game_id = created.get_json()["game_id"]
+
+    resp = client.get(f"/api/games/{game_id}", headers={"X-Primary-Until": until})
+    assert resp.status_code == 200
+    assert resp.get_json()["title"] == "Fresh"
+
+
+def test_read_without_header_uses_replica(client):
+    client, user_id = client
+    game_id = client.post("/api/games", json={"user_id": user_id, "title": "Lagging"}).get_json()["game_id"]
+
+    assert client.get(f"/api/games/{game_id}").status_code == 404
+
+
+def test_expired_header_uses_replica(client):
+    client, user_id = client
+    game_id = client.post("/api/games", json={"user_id": user_id, "title": "Expired"}).get_json()["game_id"]
+
+    assert client.get(f"/api/games/{game_id}", headers={"X-Primary-Until": "1"}).status_code == 404
+
+
+def test_far_future_header_uses_replica(client):
+    client, user_id = client
+    game_id = client.post("/api/games", json={"user_id": user_id, "title": "Pinned"}).get_json()["game_id"]
+
+    headers = {"X-Primary-Until": "99999999999"}
+    assert client.get(f"/api/games/{game_id}", headers=headers).status_code == 404
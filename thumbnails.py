@@ -0,0 +1,67 @@
+import os
+
+from sqlalchemy import func, or_, select, update
+
+from models import db, Game
+
+BACKFILL_CHUNK_SIZE = int(os.environ.get("BACKFILL_CHUNK_SIZE", 1000))
+# Chunks one HTTP call may run before handing back a checkpoint
+BACKFILL_MAX_CHUNKS_PER_REQUEST = int(os.environ.get("BACKFILL_MAX_CHUNKS_PER_REQUEST", 50))
+
+
+# --------- Thumbnails: Backfill ---------
+def backfill_thumbnails(default_url=None, user_id=None, start_after=0,
+                        chunk_size=BACKFILL_CHUNK_SIZE, max_chunks=None, on_progress=None):
+    """Fill missing game thumbnails from cover_url, else ``default_url``.
+
+    Each chunk selects the next ``chunk_size`` ids above ``start_after`` that
+    need a thumbnail (only ``user_id``'s games when given), then updates
+    those rows and commits. Work scales with the rows being fixed, locks are
+    short, and an interrupted run resumes from the returned ``last_game_id``.
+    Stops after ``max_chunks`` chunks when given; ``done`` says whether the
+    end was reached.
+    """
+    cover = func.nullif(Game.cover_url, "")
+    missing = [or_(Game.thumbnail_url.is_(None), Game.thumbnail_url == "")]
+    if default_url is None:
+        missing.append(cover.isnot(None))
+    if user_id is not None:
+        missing.append(Game.user_id == user_id)
+
+    pending = select(Game.game_id).where(*missing).order_by(Game.game_id).limit(chunk_size)
+    stmt = (
+        update(Game)
+        .where(*missing)
+        .values(thumbnail_url=func.coalesce(cover, default_url), version=Game.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+    last = start_after or 0
+    updated = 0
+    chunks = 0
+    done = False
+    while max_chunks is None or chunks < max_chunks:
+        ids = db.session.scalars(pending.where(Game.game_id > last)).all()
+        if not ids:
+            done = True
+            break
+
+        # The id range holds exactly the selected rows and walks the same index
+        res = db.session.execute(stmt.where(Game.game_id > last, Game.game_id <= ids[-1]))
+        db.session.commit()
+
+        updated += res.rowcount
+        chunks += 1
+        last = ids[-1]
+        if on_progress is not None:
+            on_progress({"last_game_id": last, "updated": updated})
+        if len(ids) < chunk_size:
+            done = True
+            break
+
+    return {
+        "updated": updated,
+        "chunks": chunks,
+        "last_game_id": last,
+        "done": done,
+    }
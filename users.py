@@ -1,8 +1,16 @@
 from flask import request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from hashing import HashingBusy, hash_password, verify_password, needs_rehash
 from models import User, db
 
 
+def _hashing_busy():
+    resp = jsonify({"message": "Too many sign-in attempts in progress, try again shortly"})
+    resp.headers["Retry-After"] = "1"
+    return resp, 503
+
+
 # --------- Users: Register ---------
 def register_user():
     data = request.get_json(silent=True) or {}
@@ -13,17 +21,33 @@ def register_user():
     if not username or not email or not password:
         return jsonify({"message": "username, email, and password are required"}), 400
 
-    existing = db.session.execute(db.select(User).filter_by(email=email)).scalar_one_or_none()
-    if existing:
+    taken = db.session.execute(
+        db.select(User.email, User.username)
+        .where(or_(func.lower(User.email) == email, User.username == username))
+        .limit(2)
+    ).all()
+    if any(row.email.lower() == email for row in taken):
         return jsonify({"message": "email already registered"}), 409
+    if taken:
+        return jsonify({"message": "username already taken"}), 409
+
+    try:
+        password_hash = hash_password(password)
+    except HashingBusy:
+        return _hashing_busy()
 
     user = User(
         username=username,
         email=email,
-        password_hash=generate_password_hash(password),
+        password_hash=password_hash,
     )
     db.session.add(user)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent registration for the same email or username
+        db.session.rollback()
+        return jsonify({"message": "email or username already registered"}), 409
 
     return jsonify({"message": "Registration successful", "user_id": user.user_id}), 201
 
@@ -39,10 +63,19 @@ def login_user():
         return jsonify({"message": "email or username and password required"}), 400
 
     q = db.select(User)
-    q = q.filter_by(email=email) if email else q.filter_by(username=username)
+    q = q.where(func.lower(User.email) == email) if email else q.filter_by(username=username)
+
+    # Oldest account wins if legacy rows share a username or differ only in email case
+    user = db.session.scalar(q.order_by(User.user_id).limit(1))
+    try:
+        if not user or not verify_password(user.password_hash, password):
+            return jsonify({"message": "Invalid email or password"}), 401
 
-    user = db.session.execute(q).scalar_one_or_none()
-    if not user or not check_password_hash(user.password_hash, password):
-        return jsonify({"message": "Invalid email or password"}), 401
+        # Upgrade hashes made with older parameters while we have the plaintext
+        if needs_rehash(user.password_hash):
+            user.password_hash = hash_password(password)
+            db.session.commit()
+    except HashingBusy:
+        return _hashing_busy()
 
     return jsonify({"message": "Logged in", "user_id": user.user_id}), 200